@@ -1,16 +1,17 @@
 
-import sys, os
+import sys, os, time
+_run_started = time.perf_counter()
 # Add the directory containing VA_v1.py to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import streamlit as st
 import base64
+import io
 from pathlib import Path
-# Import tab modules
-from tabs.tab_email import show_email_tab
-from tabs.tab_summary import show_summary_tab
-from tabs.tab_edit import show_edit_tab
-from tabs.tab_about import show_about_tab
+from PIL import Image
+# Tab modules (and their heavy dependencies) are imported lazily by load_tab
+import tabs as tab_registry
+from tabs import metrics
 
 # ---------- Streamlit Page Setup ----------
 
@@ -20,8 +21,6 @@ st.set_page_config(
     page_icon="🤖",
     initial_sidebar_state="collapsed"
 )
-print("Current working directory:", os.getcwd())
-print("Python search paths:", sys.path)
 # ==========================================================
 # 🌙 Dark Theme + Styling
 # ==========================================================
@@ -70,13 +69,23 @@ st.markdown(
 # 🌟 Header with Logo + Title + Subtitle
 # ==========================================================
 logo_path = Path("ML Logo 1.png")
+LOGO_PIXELS = 180  # displayed at 90px; 2x for high-DPI screens
+
+@st.cache_data
+def logo_data_uri(path, mtime):
+    # Encoded once per process (and per file change) instead of on every rerun,
+    # downscaled from the 1024px source so each page load ships a few KB
+    with Image.open(path) as img:
+        img.thumbnail((LOGO_PIXELS, LOGO_PIXELS))
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("utf-8")
 
 def render_header():
     logo_html = ""
     if logo_path.exists():
-        with open(logo_path, "rb") as f:
-            logo_base64 = base64.b64encode(f.read()).decode("utf-8")
-            logo_html = f'<img src="data:image/png;base64,{logo_base64}" width="90" style="border-radius:12px; margin-bottom:10px;">'
+        logo_uri = logo_data_uri(str(logo_path), logo_path.stat().st_mtime)
+        logo_html = f'<img src="{logo_uri}" width="90" style="border-radius:12px; margin-bottom:10px;">'
 
     st.markdown(
         f"""
@@ -119,25 +128,55 @@ st.sidebar.markdown("---")
 st.sidebar.success("💡 Tip: Upload a document or paste it to see the assistant in action!") #Upload a document or image to see the assistant in action!
 
 # ---------- TABS ----------
-tabs = st.tabs([
-    "Email Drafting",
-    "Summarization",
-    "Editorial Support",
-    #"Image → Text (OCR)",
-    "About"
-])
-
-with tabs[0]:
-    show_email_tab()
-
-with tabs[1]:
-    show_summary_tab()
-
-with tabs[2]:
-    show_edit_tab()
-
-#with tabs[3]:
- #   show_ocr_tab()
-
-with tabs[3]:
-    show_about_tab()
+# (label, show_*_tab function name); each module is imported when its tab is first rendered
+TABS = [
+    ("Email Drafting", "show_email_tab"),
+    ("Summarization", "show_summary_tab"),
+    ("Editorial Support", "show_edit_tab"),
+    #("Image → Text (OCR)", "show_ocr_tab"),
+    ("About", "show_about_tab"),
+]
+
+@st.fragment
+def render_tab(label, show_fn):
+    # A fragment: widget changes inside a tab rerun only that tab, not the header,
+    # CSS, sidebar and the other tabs.
+    # "render" covers the whole tab run; stages inside it are labelled with the tab
+    with metrics.tab_context(label), metrics.span("render"):
+        tab_registry.load_tab(show_fn)()
+
+tabs = st.tabs([label for label, _ in TABS])
+
+for tab, (label, show_fn) in zip(tabs, TABS):
+    with tab:
+        render_tab(label, show_fn)
+
+# ---------- Metrics ----------
+# VA_METRICS_PORT serves /metrics for a local Prometheus scrape;
+# VA_METRICS_PANEL=1 shows the admin panel in the sidebar
+if os.getenv("VA_METRICS_PORT"):
+    metrics.start_http_server(int(os.environ["VA_METRICS_PORT"]))
+
+if os.getenv("VA_METRICS_PANEL") == "1":
+    with st.sidebar.expander("📊 Performance metrics (admin)"):
+        rows = metrics.registry.summary()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("No spans recorded yet.")
+        st.caption(f"Process memory: {metrics.rss_bytes() / 1e6:.0f} MB")
+        st.download_button("📥 Prometheus", metrics.registry.to_prometheus(), file_name="metrics.prom",
+                           key="metrics_prom")
+        st.download_button("📥 JSON lines", metrics.registry.to_jsonl(), file_name="metrics.jsonl",
+                           key="metrics_jsonl")
+        if st.button("Reset metrics", key="metrics_reset"):
+            metrics.registry.reset()
+
+# ---------- Startup timing ----------
+# The first script run in a process includes all tab imports; record it once as
+# "startup" and "tab_import" spans so cold start can be tracked in the metrics
+if tab_registry.STARTUP_SECONDS is None:
+    tab_registry.STARTUP_SECONDS = time.perf_counter() - _run_started
+    metrics.record("startup", tab_registry.STARTUP_SECONDS)
+    for name, secs in tab_registry.TAB_IMPORT_SECONDS.items():
+        metrics.record("tab_import", secs, module=name)
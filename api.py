@@ -0,0 +1,276 @@
+"""
+Headless HTTP API for the assistant.
+
+Exposes email drafting, summarization, editorial support and OCR as JSON
+endpoints, reusing the functions in tabs/ without Streamlit reruns. Handlers
+are async; the blocking work runs in threads via asyncio.to_thread under a
+global concurrency limit, and LLM failures map to HTTP status codes.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 2
+
+Endpoints (POST unless noted):
+- /email, /email/batch
+- /summarize, /summarize/file (multipart upload), /summarize/batch
+- /edit, /edit/batch
+- /ocr (multipart image), /ocr/batch (multipart images / scanned PDFs)
+- GET /health, GET /metrics (Prometheus text)
+
+Tuning: VA_API_MAX_CONCURRENCY, VA_API_MAX_BATCH, VA_OCR_PRESET (OCR preprocessing preset).
+"""
+
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from tabs import metrics
+from tabs.doc_ingest import ExtractionError, extract_uploaded_text
+from tabs.llm_client import LLMError
+from tabs.prompt_compact import compaction_report
+from tabs.tab_edit import edit_budget, editorial_support
+from tabs.tab_email import draft_email_with_ai
+from tabs.tab_summary import LENGTH_PROMPTS, openai_summarize_text
+
+MAX_CONCURRENCY = int(os.getenv("VA_API_MAX_CONCURRENCY", 32))
+MAX_BATCH = int(os.getenv("VA_API_MAX_BATCH", 100))
+
+# LLMError.kind -> HTTP status
+ERROR_STATUS = {
+    "overloaded": 503,
+    "rate_limit": 429,
+    "timeout": 504,
+    "connection": 502,
+    "server": 502,
+    "client": 400,
+    "config": 500,
+}
+
+_slots = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _slots
+    # The default to_thread pool has min(32, cpus + 4) threads; size it to the concurrency limit
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=MAX_CONCURRENCY))
+    _slots = asyncio.Semaphore(MAX_CONCURRENCY)
+    yield
+
+
+app = FastAPI(title="AI Virtual Assistant API", lifespan=lifespan)
+
+
+# =============================
+# 📦 Request Models
+# =============================
+class EmailRequest(BaseModel):
+    subject: str
+    recipient: str = ""
+    tone: str = "Professional"
+    details: str
+    email_type: str = "Follow-up"
+    length: str = "Medium (1 paragraph)"
+
+
+class SummaryRequest(BaseModel):
+    text: str = Field(min_length=1)
+    length: str = "Short (3–5 lines)"
+
+
+class EditRequest(BaseModel):
+    text: str = Field(min_length=1)
+    goal: str = "Improve grammar & clarity"
+
+
+class EmailBatch(BaseModel):
+    items: List[EmailRequest]
+
+
+class SummaryBatch(BaseModel):
+    items: List[SummaryRequest]
+
+
+class EditBatch(BaseModel):
+    items: List[EditRequest]
+
+
+# =============================
+# ⚙️ Execution Helpers
+# =============================
+class _NamedUpload(io.BytesIO):
+    # extract_uploaded_text expects Streamlit's UploadedFile (getvalue() + name)
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+async def _run(endpoint, fn, *args):
+    """Run a blocking assistant function in a thread under the concurrency limit."""
+    async with _slots:
+        with metrics.tab_context(f"api:{endpoint}"):
+            return await asyncio.to_thread(fn, *args)
+
+
+async def _call(endpoint, fn, *args):
+    try:
+        return await _run(endpoint, fn, *args)
+    except LLMError as e:
+        raise HTTPException(status_code=ERROR_STATUS.get(e.kind, 500), detail=str(e)) from e
+
+
+async def _batch(endpoint, calls):
+    """Run (fn, *args) calls concurrently; one {"result"} or {"error"} entry per call, in order."""
+    if len(calls) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH} items per batch.")
+
+    async def one(fn, *args):
+        try:
+            return {"result": await _run(endpoint, fn, *args)}
+        except LLMError as e:
+            return {"error": str(e), "kind": e.kind, "retryable": e.retryable}
+
+    return {"results": await asyncio.gather(*[one(*call) for call in calls])}
+
+
+def _check_length(length):
+    if length not in LENGTH_PROMPTS:
+        raise HTTPException(status_code=422, detail=f"length must be one of {list(LENGTH_PROMPTS)}")
+
+
+def _check_edit_size(text, goal):
+    # The app warns before cutting an over-long edit; the API refuses it instead
+    budget = edit_budget(goal)
+    report = compaction_report(text, budget, keep_layout=True)
+    if report["truncated"]:
+        raise HTTPException(
+            status_code=413,
+            detail=f"text exceeds the {budget:,}-token limit for this goal by ≈ {report['tokens_truncated']:,} tokens",
+        )
+
+
+def _email_args(r):
+    return r.subject, r.recipient, r.tone, r.details, r.email_type, r.length
+
+
+# =============================
+# ✉️ Email / 📄 Summary / ✍️ Edit
+# =============================
+@app.post("/email")
+async def email(request: EmailRequest):
+    return {"draft": await _call("email", draft_email_with_ai, *_email_args(request))}
+
+
+@app.post("/email/batch")
+async def email_batch(batch: EmailBatch):
+    return await _batch("email", [(draft_email_with_ai, *_email_args(r)) for r in batch.items])
+
+
+@app.post("/summarize")
+async def summarize(request: SummaryRequest):
+    _check_length(request.length)
+    return {"summary": await _call("summarize", openai_summarize_text, request.text, request.length)}
+
+
+@app.post("/summarize/file")
+async def summarize_file(file: UploadFile = File(...), length: str = Form("Short (3–5 lines)")):
+    _check_length(length)
+    if not file.filename.lower().endswith((".txt", ".pdf", ".docx")):
+        raise HTTPException(status_code=415, detail="Upload a .txt, .pdf or .docx file.")
+    upload = _NamedUpload(file.filename, await file.read())
+    try:
+        text = await _run("summarize", extract_uploaded_text, upload)
+    except ExtractionError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    if not text:
+        raise HTTPException(status_code=422, detail="No text could be extracted from the file.")
+    return {"summary": await _call("summarize", openai_summarize_text, text, length), "characters": len(text)}
+
+
+@app.post("/summarize/batch")
+async def summarize_batch(batch: SummaryBatch):
+    for r in batch.items:
+        _check_length(r.length)
+    return await _batch("summarize", [(openai_summarize_text, r.text, r.length) for r in batch.items])
+
+
+@app.post("/edit")
+async def edit(request: EditRequest):
+    _check_edit_size(request.text, request.goal)
+    return {"text": await _call("edit", editorial_support, request.text, request.goal)}
+
+
+@app.post("/edit/batch")
+async def edit_batch(batch: EditBatch):
+    for r in batch.items:
+        _check_edit_size(r.text, r.goal)
+    return await _batch("edit", [(editorial_support, r.text, r.goal) for r in batch.items])
+
+
+# =============================
+# 🖼️ OCR
+# =============================
+def _require_ocr_reader():
+    from tabs.tab_ocr import get_easyocr_reader
+
+    try:
+        get_easyocr_reader()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"The OCR engine is not available: {e}") from e
+
+
+def _ocr_one(data):
+    from PIL import Image, UnidentifiedImageError
+    from tabs.tab_ocr import extract_and_parse
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            rgb = image.convert("RGB")
+    except UnidentifiedImageError as e:
+        raise HTTPException(status_code=415, detail="Upload a PNG or JPEG image.") from e
+    except OSError as e:  # recognised format, but truncated or corrupt
+        raise HTTPException(status_code=422, detail=f"The image could not be decoded: {e}") from e
+
+    text, readable, structured = extract_and_parse(rgb, data)
+    if text.startswith("⚠️"):
+        _require_ocr_reader()  # 503 when the model cannot be loaded
+        raise HTTPException(status_code=500, detail=text)
+    return {"text": text, "readable": readable, "structured": structured}
+
+
+def _ocr_many(files):
+    from tabs.ocr_batch import run_batch_ocr
+
+    _require_ocr_reader()
+    return list(run_batch_ocr(files))
+
+
+@app.post("/ocr")
+async def ocr(file: UploadFile = File(...)):
+    return await _run("ocr", _ocr_one, await file.read())
+
+
+@app.post("/ocr/batch")
+async def ocr_batch(files: List[UploadFile] = File(...)):
+    if len(files) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH} files per batch.")
+    uploads = [(f.filename, await f.read()) for f in files]
+    return {"results": await _run("ocr", _ocr_many, uploads)}
+
+
+# =============================
+# 🩺 Health / Metrics
+# =============================
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return metrics.registry.to_prometheus()
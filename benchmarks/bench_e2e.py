@@ -0,0 +1,185 @@
+"""
+Offline end-to-end benchmark.
+
+Runs each tab's pipeline against the local stub LLM server (no network, no
+API key) over fixture documents and receipt images, and reports p50/p95/p99
+latency, throughput and peak Python memory per pipeline:
+- ingest_*: extract_uploaded_text on .txt / .pdf / .docx fixtures
+- summary_short / summary_long: openai_summarize_text (long runs map-reduce)
+- email: draft_email_with_ai
+- edit: editorial_support
+- ocr: extract_text + parse_text (preprocess_image + parse_text without EasyOCR models)
+followed by one row per llm_router route (model, calls, mean latency, tokens).
+
+    python benchmarks/bench_e2e.py [--iterations 10] [--concurrency 4]
+        [--latency 0.3] [--tokens-per-second 80] [--json results.json]
+
+The response and text caches are disabled so every iteration does the full
+work; pass --cache to measure with them on.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import (  # noqa: E402
+    FixtureUpload, document_text, make_docx, make_pdf, receipt_fixtures,
+)
+from benchmarks.stub_llm_server import start_stub_server  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_pipelines(args):
+    # Imported here so the environment (stub URL, cache settings) is in place first
+    from tabs import doc_ingest
+    from tabs.receipt_parser import parse_text
+    from tabs.tab_edit import editorial_support
+    from tabs.tab_email import draft_email_with_ai
+    from tabs.tab_ocr import extract_text, get_easyocr_reader, preprocess_image
+    from tabs.tab_summary import openai_summarize_text
+
+    if not args.cache:
+        doc_ingest.text_cache = doc_ingest.TextCache(tempfile.mkdtemp(), max_entries=0, disk_max_bytes=0)
+
+    short_text = document_text(paragraphs=6, seed=1)
+    long_text = document_text(paragraphs=args.long_paragraphs, seed=2)
+    paragraphs = short_text.split("\n\n")
+    uploads = {
+        "txt": ("report.txt", long_text.encode("utf-8")),
+        "pdf": ("report.pdf", make_pdf([p.replace(". ", ".\n") for p in long_text.split("\n\n")])),
+        "docx": ("report.docx", make_docx(long_text.split("\n\n"), image_bytes=2 * 1024 * 1024)),
+    }
+    receipts = receipt_fixtures(args.receipts)
+
+    try:
+        get_easyocr_reader()
+        ocr = lambda i: parse_text(extract_text(receipts[i % len(receipts)][0]))
+    except Exception as e:
+        print(f"EasyOCR unavailable ({type(e).__name__}); timing preprocessing + parsing only.")
+        ocr = lambda i: (preprocess_image(receipts[i % len(receipts)][0]),
+                         parse_text(receipts[i % len(receipts)][1]))
+
+    pipelines = {
+        f"ingest_{ext}": (lambda i, name=name, data=data:
+                          doc_ingest.extract_uploaded_text(FixtureUpload(name, data)))
+        for ext, (name, data) in uploads.items()
+    }
+    pipelines.update({
+        "summary_short": lambda i: openai_summarize_text(short_text, "Short (3–5 lines)"),
+        "summary_long": lambda i: openai_summarize_text(long_text, "Detailed paragraph"),
+        "email": lambda i: draft_email_with_ai(
+            "Project update", "the team", "Professional", paragraphs[i % len(paragraphs)],
+            "Internal Update", "Medium (1 paragraph)"),
+        "edit": lambda i: editorial_support(paragraphs[i % len(paragraphs)], "Make it concise"),
+        "ocr": ocr,
+    })
+    return pipelines
+
+
+def run_pipeline(fn, iterations, concurrency):
+    """Run fn(i) for i in range(iterations) on `concurrency` threads; returns (latencies, wall, errors)."""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            fn(i)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(iterations)))
+    wall = time.perf_counter() - start
+    errors = [e for _, e in results if e is not None]
+    return [latency for latency, _ in results], wall, errors
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn(0)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def print_routes():
+    """Per-route API call stats from the metrics registry, to tune llm_router.ROUTES."""
+    from tabs import metrics
+
+    rows = [r for r in metrics.registry.summary() if r["stage"] == "api_call" and r["cache"] == "miss"]
+    if not rows:
+        return
+    print(f"\n{'route':<40}{'model':<14}{'calls':>7}{'mean ms':>9}{'in tok':>9}{'out tok':>9}{'cut':>5}")
+    for r in rows:
+        print(f"{r['route']:<40}{r['model']:<14}{r['count']:>7}{r['seconds_mean'] * 1000:>9.0f}"
+              f"{r['input_tokens'] // r['count']:>9}{r['output_tokens'] // r['count']:>9}"
+              f"{'yes' if r.get('truncated') else '':>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub time-to-first-token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--long-paragraphs", type=int, default=300, help="size of the long fixture document")
+    parser.add_argument("--receipts", type=int, default=4)
+    parser.add_argument("--only", nargs="*", help="pipeline names to run (default: all)")
+    parser.add_argument("--cache", action="store_true", help="keep the response and text caches enabled")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON for regression checks")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, tokens_per_second=args.tokens_per_second)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    if not args.cache:
+        os.environ["VA_LLM_CACHE"] = "off"
+
+    pipelines = build_pipelines(args)
+    results = {}
+    print(f"\n{'pipeline':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'peak MB':>9}{'errors':>8}")
+    for name, fn in pipelines.items():
+        if args.only and name not in args.only:
+            continue
+        latencies, wall, errors = run_pipeline(fn, args.iterations, args.concurrency)
+        # Measured separately: tracemalloc slows everything it traces
+        peak = peak_memory(fn)
+        results[name] = {
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "throughput_rps": len(latencies) / wall,
+            "peak_mb": peak / 1e6,
+            "errors": len(errors),
+        }
+        r = results[name]
+        print(f"{name:<16}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}{r['p99_ms']:>10.0f}"
+              f"{r['throughput_rps']:>9.2f}{r['peak_mb']:>9.1f}{r['errors']:>8}")
+        if errors:
+            print(f"  first error: {errors[0]!r}")
+    server.shutdown()
+    print_routes()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Local extractive summarizer benchmark.
+
+Times extractive_summarize (TF-IDF + TextRank) on synthetic documents from a
+few pages to a few hundred pages, and reports peak Python memory.
+
+    python benchmarks/bench_extractive.py [--sizes 10 100 1000 5000] [--repeat 5]
+
+Sizes are paragraphs (~500 characters each).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import document_text  # noqa: E402
+from tabs.tab_summary import EXTRACTIVE_SENTENCES, extractive_summarize, split_sentences  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'paragraphs':>10}{'chars':>11}{'sentences':>11}{'option':>26}{'p50 ms':>9}{'max ms':>9}{'peak MB':>9}")
+    for size in args.sizes:
+        text = document_text(paragraphs=size, seed=size)
+        sentences = len(split_sentences(text))
+        for option in EXTRACTIVE_SENTENCES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                extractive_summarize(text, option)
+                timings.append((time.perf_counter() - start) * 1000)
+            tracemalloc.start()
+            extractive_summarize(text, option)
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            print(f"{size:>10}{len(text):>11}{sentences:>11}{option:>26}"
+                  f"{statistics.median(timings):>9.1f}{max(timings):>9.1f}{peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
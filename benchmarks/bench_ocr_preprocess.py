@@ -0,0 +1,68 @@
+"""
+OCR preprocessing benchmark.
+
+Compares latency (and, when EasyOCR is installed, extraction accuracy) of
+preprocess_image configurations on synthetic 12-megapixel receipt photos.
+
+    python benchmarks/bench_ocr_preprocess.py [--count 8] [--no-ocr]
+
+Accuracy is the difflib similarity between recognized and ground-truth text.
+"""
+
+import argparse
+import difflib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import receipt_fixtures  # noqa: E402
+from tabs import tab_ocr  # noqa: E402
+
+# Extra configurations explored alongside the shipped presets
+GRID = {
+    f"h{height}_{denoise}": {"target_text_height": height, "denoise": denoise}
+    for height in (20, 24, 32, 48)
+    for denoise in ("bilateral_fast", "median", "none")
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=8)
+    parser.add_argument("--no-ocr", action="store_true", help="only measure preprocessing latency")
+    args = parser.parse_args()
+
+    fixtures = receipt_fixtures(args.count)
+    tab_ocr.PREPROCESS_PRESETS.update(GRID)
+
+    reader = None
+    if not args.no_ocr:
+        try:
+            reader = tab_ocr.get_easyocr_reader()
+        except Exception as e:  # not installed, or models unavailable offline
+            print(f"EasyOCR unavailable ({type(e).__name__}); reporting latency only.\n")
+
+    print(f"{'preset':<22}{'prep p50 ms':>12}{'ocr p50 ms':>12}{'accuracy':>10}{'output px':>14}")
+    for preset in tab_ocr.PREPROCESS_PRESETS:
+        prep_ms, ocr_ms, scores = [], [], []
+        for image, truth in fixtures:
+            start = time.perf_counter()
+            processed = tab_ocr.preprocess_image(image, preset)
+            prep_ms.append((time.perf_counter() - start) * 1000)
+            if reader is not None:
+                start = time.perf_counter()
+                text = "\n".join(reader.readtext(processed, detail=0, paragraph=True))
+                ocr_ms.append((time.perf_counter() - start) * 1000)
+                scores.append(difflib.SequenceMatcher(None, text.lower(), truth.lower()).ratio())
+
+        ocr = f"{statistics.median(ocr_ms):>12.0f}" if ocr_ms else f"{'-':>12}"
+        acc = f"{statistics.mean(scores):>10.3f}" if scores else f"{'-':>10}"
+        size = f"{processed.shape[1]}x{processed.shape[0]}"
+        print(f"{preset:<22}{statistics.median(prep_ms):>12.1f}{ocr}{acc}{size:>14}")
+
+
+if __name__ == "__main__":
+    main()
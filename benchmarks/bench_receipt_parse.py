@@ -0,0 +1,100 @@
+"""
+Receipt post-processing throughput benchmark.
+
+Runs clean_ocr_text + parse_text over a large synthetic corpus of OCR-like
+receipt texts, next to the previous per-call-compiled implementation, and
+checks that parse_text output is unchanged.
+
+    python benchmarks/bench_receipt_parse.py [--count 20000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import receipt_texts  # noqa: E402
+from tabs.receipt_parser import clean_ocr_text, parse_text  # noqa: E402
+
+OCR_NOISE = ["Toial", "CAED", "GIei", "CASUNNGE", "EXPIRES", "12/03", "€", "  "]
+
+
+# --- Previous implementation, kept as the baseline ---
+def legacy_clean_ocr_text(text):
+    replacements = {"Toial": "Total", "S": "$", "Am": "", "EXPIRES": "", "PAYMENT": "",
+                    "CAED": "CARD", "GIei": "GIFT", "CASUNNGE": "CASH"}
+    for wrong, right in replacements.items():
+        text = text.replace(wrong, right)
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    return "\n".join(l for l in lines if not re.match(r'^[\d\s/.,$]+$', l))
+
+
+def legacy_parse_text(text):
+    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+    text = text.replace("  ", " ")
+    store = re.search(r'(?i)(store|shop|market|mart|supermarket|inc|co|ltd|llc|receipt|invoice)\s?.{0,60}', text)
+    date = re.search(r'(\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b)', text)
+    total = re.search(r'(?i)(total|amount\s+due|balance\s+due|grand\s+total)[^\d]*(\d+[.,]\d{2})', text)
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    items = [l for l in lines if re.search(r'[A-Za-z]{2,}.*\d+[.,]\d{2}', l)]
+    readable = []
+    if store:
+        readable.append(f"🛒 Store: {store.group(0)}")
+    if date:
+        readable.append(f"📅 Date: {date.group(1)}")
+    if total:
+        readable.append(f"💰 Total: ${total.group(2)}")
+    readable.append("\n🧾 Detected Items:")
+    readable.extend([f"{i+1}. {item}" for i, item in enumerate(items)] or ["No items detected."])
+    return "\n".join(readable), {
+        "store": store.group(0) if store else None,
+        "date": date.group(1) if date else None,
+        "total": total.group(2) if total else None,
+        "items": items,
+    }
+
+
+def noisy_corpus(count, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for text in receipt_texts(count, seed):
+        lines = text.splitlines()
+        for _ in range(rng.randint(0, 3)):
+            lines.insert(rng.randrange(len(lines)), rng.choice(OCR_NOISE) + " " + rng.choice(lines))
+        corpus.append("\n".join(lines))
+    return corpus
+
+
+def throughput(fn, corpus):
+    start = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = noisy_corpus(args.count)
+    mismatches = sum(parse_text(t) != legacy_parse_text(t) for t in corpus)
+    print(f"parse_text mismatches vs legacy: {mismatches} / {len(corpus)}\n")
+
+    print(f"{'stage':<28}{'legacy rec/s':>14}{'new rec/s':>12}{'speedup':>9}")
+    for name, legacy, new in [
+        ("clean_ocr_text", legacy_clean_ocr_text, clean_ocr_text),
+        ("parse_text", legacy_parse_text, parse_text),
+        ("clean + parse", lambda t: legacy_parse_text(legacy_clean_ocr_text(t)),
+         lambda t: parse_text(clean_ocr_text(t))),
+    ]:
+        before, after = throughput(legacy, corpus), throughput(new, corpus)
+        print(f"{name:<28}{before:>14.0f}{after:>12.0f}{after / before:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
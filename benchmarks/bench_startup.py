@@ -0,0 +1,58 @@
+"""
+Cold-start import benchmark.
+
+Times, in fresh interpreters, how long it takes to import the tabs package and
+each tab module, i.e. what VA_v1.py pays before the first render.
+
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    "tabs",
+    "tabs.tab_email",
+    "tabs.tab_summary",
+    "tabs.tab_edit",
+    "tabs.tab_about",
+    "tabs.tab_ocr",
+]
+
+SNIPPET = (
+    "import time, importlib; start = time.perf_counter(); "
+    "importlib.import_module({target!r}); print(time.perf_counter() - start)"
+)
+
+
+def time_import(target):
+    result = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(target=target)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<20}{'median (s)':>12}{'min (s)':>10}")
+    for target in TARGETS:
+        times = [time_import(target) for _ in range(args.runs)]
+        if None in times:
+            print(f"{target:<20}{'import failed':>22}")
+            continue
+        print(f"{target:<20}{statistics.median(times):>12.3f}{min(times):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
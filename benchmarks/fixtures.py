@@ -0,0 +1,141 @@
+"""
+Synthetic fixtures shared by the benchmarks.
+
+Everything is generated deterministically from a seed so runs are
+comparable without shipping binary fixture files.
+"""
+
+import io
+import random
+import zipfile
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+STORES = ["FRESH MART", "CITY SUPERMARKET", "CORNER SHOP LLC", "GREEN GROCERS INC", "BEST BUY CO"]
+ITEMS = ["Milk 2L", "Bread", "Eggs dozen", "Coffee beans", "Apples", "Rice 5kg", "Olive oil",
+         "Cheddar", "Bananas", "Pasta", "Tomatoes", "Yogurt", "Butter", "Orange juice"]
+
+
+def receipt_lines(rng):
+    """Ground-truth text lines for one receipt."""
+    items = [(rng.choice(ITEMS), rng.randint(100, 2500) / 100) for _ in range(rng.randint(4, 10))]
+    total = sum(price for _, price in items)
+    return (
+        [rng.choice(STORES), "RECEIPT", f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"]
+        + [f"{name} {price:.2f}" for name, price in items]
+        + [f"TOTAL {total:.2f}", "THANK YOU"]
+    )
+
+
+def render_receipt(lines, width=3000, height=4000, font_size=64, noise=12, seed=0):
+    """Render lines as a phone-photo-sized grayscale-ish receipt with sensor noise."""
+    img = Image.new("RGB", (width, height), (235, 232, 225))
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=font_size)
+    y = height // 10
+    for line in lines:
+        draw.text((width // 8, y), line, fill=(30, 30, 30), font=font)
+        y += int(font_size * 1.6)
+    arr = np.asarray(img).astype(np.int16)
+    arr += np.random.default_rng(seed).normal(0, noise, arr.shape).astype(np.int16)
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+
+
+def receipt_fixtures(count=8, seed=0, **render_kwargs):
+    """Return [(PIL image, ground-truth text)] for `count` synthetic receipts."""
+    rng = random.Random(seed)
+    fixtures = []
+    for i in range(count):
+        lines = receipt_lines(rng)
+        fixtures.append((render_receipt(lines, seed=seed + i, **render_kwargs), "\n".join(lines)))
+    return fixtures
+
+
+def receipt_texts(count=1000, seed=0):
+    """OCR-like receipt texts (no images) for text post-processing benchmarks."""
+    rng = random.Random(seed)
+    return ["\n".join(receipt_lines(rng)) for _ in range(count)]
+
+
+# --- Documents ---
+SENTENCE_WORDS = ("the contract requires the supplier to deliver all goods by the agreed date "
+                  "payment terms are net thirty days and late fees apply after notice "
+                  "either party may terminate with sixty days written notice").split()
+
+
+def document_text(paragraphs=50, seed=0):
+    """Plain report-like text with `paragraphs` paragraphs of 4-8 sentences."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(paragraphs):
+        sentences = [
+            " ".join(rng.choice(SENTENCE_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(4, 8))
+        ]
+        out.append(" ".join(sentences))
+    return "\n\n".join(out)
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages):
+    """Minimal text PDF (Helvetica, one text line per input line) for the given page texts."""
+    n = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(n))}] /Count {n} >>",
+    ]
+    font_ref = 3 + 2 * n
+    for i, page in enumerate(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font_ref} 0 R >> >> /Contents {4 + 2 * i} 0 R >>")
+        lines = " T* ".join(f"({_pdf_escape(line)}) Tj" for line in page.splitlines() or [""])
+        stream = f"BT /F1 10 Tf 12 TL 40 750 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def make_docx(paragraphs, image_bytes=0):
+    """Minimal .docx with the given paragraphs and, optionally, an embedded media blob."""
+    body = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{p.replace("&", "&amp;").replace("<", "&lt;")}</w:t></w:r></w:p>'
+        for p in paragraphs
+    )
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f"<w:body>{body}</w:body></w:document>")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml",
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="xml" ContentType="application/xml"/>'
+                         '<Override PartName="/word/document.xml" ContentType="application/'
+                         'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr("word/document.xml", document)
+        if image_bytes:
+            archive.writestr("word/media/image1.png", np.random.default_rng(0).bytes(image_bytes),
+                             compress_type=zipfile.ZIP_STORED)
+    return buffer.getvalue()
+
+
+class FixtureUpload(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile (a BytesIO with a name)."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
@@ -0,0 +1,120 @@
+"""
+Local OpenAI-compatible stub for offline benchmarks.
+
+Serves POST /v1/chat/completions (plain and stream=True, with `n` choices and
+usage) after a configurable time-to-first-token, then emits tokens at a
+configurable rate. Point the app at it with OPENAI_BASE_URL.
+
+    python benchmarks/stub_llm_server.py --port 8011 --latency 0.4 --tokens-per-second 60
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=stub streamlit run VA_v1.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the quarterly report shows steady growth in revenue while costs remain under control "
+         "and the team recommends continuing the current plan with minor adjustments").split()
+
+
+def _prompt_tokens(messages):
+    return sum(len(m.get("content") or "") for m in messages) // 4 + 1
+
+
+def _completion_words(body):
+    count = min(body.get("max_tokens") or body.get("max_completion_tokens") or 120, 400)
+    return [WORDS[i % len(WORDS)] for i in range(count)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.3
+    tokens_per_second = 80.0
+    requests_served = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        type(self).requests_served += 1
+
+        words = _completion_words(body)
+        n = body.get("n") or 1
+        usage = {"prompt_tokens": _prompt_tokens(body.get("messages", [])),
+                 "completion_tokens": len(words) * n}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": "chatcmpl-stub", "created": int(time.time()), "model": body.get("model", "stub")}
+        time.sleep(self.latency)
+
+        if not body.get("stream"):
+            time.sleep(len(words) / self.tokens_per_second)
+            choices = [{"index": i, "message": {"role": "assistant", "content": " ".join(words)},
+                        "finish_reason": "stop"} for i in range(n)]
+            self._send_json(200, {**base, "object": "chat.completion", "choices": choices, "usage": usage})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            for word in words:
+                time.sleep(1 / self.tokens_per_second)
+                choices = [{"index": i, "delta": {"content": word + " "}, "finish_reason": None} for i in range(n)]
+                send_event(json.dumps({**base, "object": "chat.completion.chunk", "choices": choices}))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                send_event(json.dumps({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}))
+            send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client closed the stream early (e.g. a cancelled job)
+
+
+def start_stub_server(port=0, latency=0.3, tokens_per_second=80.0):
+    """Start the stub in a background thread; returns (server, base_url)."""
+    handler = type("ConfiguredStubHandler", (StubHandler,),
+                   {"latency": latency, "tokens_per_second": tokens_per_second})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.latency, args.tokens_per_second)
+    print(f"Stub LLM listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,38 @@ This package contains all tab-related modules used in VA_v1.py:
 - tab_edit: Handles text editing
 - tab_ocr: Optical character recognition tab
 - tab_about: About/info tab
+- doc_ingest: Shared, cached text extraction for uploaded documents
+- doc_spool: Large-document mode (on-disk spool, paginated view, SpooledText handles)
+- llm_client: Shared pooled OpenAI client with timeouts, retries and a concurrency limit
+- llm_cache: Exact-match LLM response cache (memory or SQLite backend)
+- llm_router: Model choice and max_tokens cap per task/option and prompt size
+- rate_limiter: Requests/tokens-per-minute scheduler for batched API calls
+- ocr_batch: Multi-file / multi-page OCR pipeline with a preprocessing process pool
+- ocr_cache: On-disk OCR result cache keyed by content hash and perceptual fingerprint
+- receipt_parser: Precompiled single-pass clean_ocr_text / parse_text for OCR output
+- metrics: Per-stage timing, token and memory spans with Prometheus / JSON-lines export
+- prompt_compact: Token counting, page header/footer and duplicate stripping, and token budgets
+- jobs: Background job runner (shared thread pool, per-session registry, progress and cancellation)
+
+Tab modules are imported lazily: `from tabs import show_ocr_tab` or
+`load_tab("show_ocr_tab")` imports tab_ocr (and EasyOCR/torch) only then.
 """
 
-from .tab_email import show_email_tab
-from .tab_summary import show_summary_tab
-from .tab_edit import show_edit_tab
-from .tab_ocr import show_ocr_tab
-from .tab_about import show_about_tab
+import importlib
+import time
+
+_TAB_MODULES = {
+    "show_email_tab": "tab_email",
+    "show_summary_tab": "tab_summary",
+    "show_edit_tab": "tab_edit",
+    "show_ocr_tab": "tab_ocr",
+    "show_about_tab": "tab_about",
+}
+
+# Seconds spent on the first import of each tab module, for startup tracking
+TAB_IMPORT_SECONDS = {}
+# Duration of the first VA_v1.py run in this process (set by VA_v1.py)
+STARTUP_SECONDS = None
 
 __all__ = [
     "show_email_tab",
@@ -21,4 +46,22 @@ __all__ = [
     "show_edit_tab",
     "show_ocr_tab",
     "show_about_tab",
+    "load_tab",
+    "TAB_IMPORT_SECONDS",
+    "STARTUP_SECONDS",
 ]
+
+
+def load_tab(name):
+    """Return the show_*_tab function `name`, importing its module on first use."""
+    module_name = _TAB_MODULES[name]
+    start = time.perf_counter()
+    module = importlib.import_module(f".{module_name}", __name__)
+    TAB_IMPORT_SECONDS.setdefault(module_name, time.perf_counter() - start)
+    return getattr(module, name)
+
+
+def __getattr__(name):
+    if name in _TAB_MODULES:
+        return load_tab(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
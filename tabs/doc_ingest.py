@@ -0,0 +1,245 @@
+"""
+Shared document ingestion.
+
+Extracts text from uploaded .txt, .pdf and .docx files and caches the result
+by a hash of the file bytes, so the same file is only parsed once across
+tabs, reruns and sessions:
+- memory tier: bounded LRU kept in the process
+- disk tier: one text file per document, evicted oldest-first by total size
+"""
+
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+from PyPDF2.errors import PyPdfError
+
+from . import metrics
+
+CACHE_DIR = Path(os.getenv("VA_CACHE_DIR", Path.home() / ".cache" / "virtual_assistant")) / "extracted"
+MEMORY_MAX_ENTRIES = 32
+MEMORY_MAX_CHARS = 50_000_000
+DISK_MAX_BYTES = 500 * 1024 * 1024
+
+# PDFs with at least this many pages are extracted in a process pool
+PARALLEL_PDF_PAGES = 64
+PAGES_PER_TASK = 16
+PDF_WORKERS = min(8, os.cpu_count() or 1)
+
+
+class TextCache:
+    """Two-tier (memory + disk) LRU cache of extracted text keyed by content hash."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MEMORY_MAX_ENTRIES,
+                 max_chars=MEMORY_MAX_CHARS, disk_max_bytes=DISK_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.txt"
+
+    def _remember(self, key, text):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            if len(text) > self.max_chars:
+                return
+            self._memory[key] = text
+            self._chars += len(text)
+            while len(self._memory) > self.max_entries or self._chars > self.max_chars:
+                _, dropped = self._memory.popitem(last=False)
+                self._chars -= len(dropped)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def set(self, key, text):
+        self._remember(key, text)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            tmp.replace(self._path(key))
+            self._evict_disk()
+        except OSError:
+            pass  # the disk tier is best-effort
+
+    def _evict_disk(self):
+        files = sorted(self.cache_dir.glob("*.txt"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        while files and total > self.disk_max_bytes:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+
+
+text_cache = TextCache()
+
+
+class ExtractionError(ValueError):
+    """An uploaded file that is corrupt or not what its extension says."""
+
+
+# --- PDF page streaming ---
+_worker_pdf = None
+
+
+def _init_pdf_worker(data):
+    # Each worker parses the PDF once and then serves page ranges from it
+    global _worker_pdf
+    _worker_pdf = PdfReader(io.BytesIO(data))
+
+
+def _extract_page_range(start, stop):
+    return [_worker_pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(data, progress=None):
+    """Yield the text of each PDF page in order, extracting every page exactly once.
+
+    Large PDFs are split into page ranges that run in a process pool.
+    `progress(done, total)` is called after each page is yielded.
+    """
+    pdf = PdfReader(io.BytesIO(data))
+    total = len(pdf.pages)
+
+    if total < PARALLEL_PDF_PAGES or PDF_WORKERS < 2:
+        for done, page in enumerate(pdf.pages, start=1):
+            yield page.extract_text() or ""
+            if progress:
+                progress(done, total)
+        return
+
+    ranges = [(start, min(start + PAGES_PER_TASK, total)) for start in range(0, total, PAGES_PER_TASK)]
+    # "spawn" avoids forking the threaded Streamlit server
+    with ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=get_context("spawn"),
+                             initializer=_init_pdf_worker, initargs=(data,)) as pool:
+        futures = [pool.submit(_extract_page_range, start, stop) for start, stop in ranges]
+        done = 0
+        for future in futures:
+            for text in future.result():
+                done += 1
+                yield text
+                if progress:
+                    progress(done, total)
+
+
+# --- DOCX paragraph streaming ---
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_HEADER_RE = re.compile(r"word/header\d*\.xml$")
+_DOCX_FOOTER_RE = re.compile(r"word/footer\d*\.xml$")
+
+
+def _iter_xml_paragraphs(stream):
+    # As in docx2txt, a paragraph's text runs until the next paragraph starts:
+    # a paragraph holding a text box (nested w:p) gives its own text first,
+    # then the box's paragraphs, and its trailing runs join the last of them.
+    # Parsed incrementally, dropping each paragraph once read, so memory stays
+    # flat however long the document is
+    stack, pieces, depth = [], None, 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == _W + "p":
+                if pieces is not None:
+                    yield "".join(pieces)
+                pieces, depth = [], depth + 1
+            continue
+        stack.pop()
+        if elem.tag == _W + "t" and pieces is not None:
+            pieces.append(elem.text or "")
+        elif elem.tag == _W + "tab" and pieces is not None:
+            pieces.append("\t")
+        elif elem.tag in (_W + "br", _W + "cr") and pieces is not None:
+            pieces.append("\n")
+        elif elem.tag == _W + "p":
+            depth -= 1
+            if depth == 0 and stack:
+                stack[-1].remove(elem)
+    if pieces is not None:
+        yield "".join(pieces)
+
+
+def iter_docx_paragraphs(source):
+    """Yield the paragraphs of a .docx (headers, body, then footers) from bytes or a binary file.
+
+    Only the XML text parts are read, decompressed as a stream; images and
+    other media in the archive are never loaded.
+    """
+    with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as archive:
+        names = archive.namelist()
+        parts = ([n for n in names if _DOCX_HEADER_RE.match(n)] + ["word/document.xml"]
+                 + [n for n in names if _DOCX_FOOTER_RE.match(n)])
+        for part in parts:
+            with archive.open(part) as stream:
+                yield from _iter_xml_paragraphs(stream)
+
+
+# --- Format-specific extraction ---
+def _extract(name, source, progress=None):
+    text = ""
+    try:
+        if name.endswith(".txt"):
+            text = source.getvalue().decode("utf-8")
+        elif name.endswith(".pdf"):
+            # Form feeds mark page breaks, so prompt_compact can find page headers/footers
+            text = "\n\f".join(page for page in iter_pdf_pages(source.getvalue(), progress) if page)
+        elif name.endswith(".docx"):
+            # Reads from the upload in place, without copying the (possibly image-heavy) file
+            text = "\n\n".join(iter_docx_paragraphs(source))
+    except (PyPdfError, zipfile.BadZipFile, KeyError, ET.ParseError, UnicodeDecodeError) as e:
+        raise ExtractionError(f"Could not read {name}: {e}") from e
+    return text.strip()
+
+
+def upload_key(uploaded_file):
+    """Cache key of an upload: its extension plus a hash of its bytes."""
+    ext = os.path.splitext(uploaded_file.name.lower())[1].lstrip(".")
+    with uploaded_file.getbuffer() as view:  # hash without copying the upload
+        return ext + "-" + hashlib.sha256(view).hexdigest()
+
+
+def extract_uploaded_text(uploaded_file, progress=None):
+    """Extract text from .txt, .pdf, or .docx files, reusing cached results.
+
+    `progress(done, total)` reports page progress while a PDF is parsed.
+    Raises ExtractionError for files that cannot be parsed.
+    """
+    name = uploaded_file.name.lower()
+    ext = os.path.splitext(name)[1].lstrip(".")
+    with metrics.span("ingest", format=ext):
+        key = upload_key(uploaded_file)
+        text = text_cache.get(key)
+    with metrics.span("extract", format=ext, cache="hit" if text is not None else "miss") as span:
+        if text is None:
+            uploaded_file.seek(0)
+            text = _extract(name, uploaded_file, progress)
+            text_cache.set(key, text)
+        span.add_tokens(output=len(text) // 4)
+    return text
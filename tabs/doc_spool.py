@@ -0,0 +1,177 @@
+"""
+Large-document mode.
+
+Putting a multi-megabyte extraction into st.text_area(value=...) sends it to
+the browser and keeps a copy in session state on every rerun. Uploads whose
+text exceeds LARGE_DOCUMENT_BYTES are instead spooled to a file on disk, and
+the tabs hold a small SpooledText handle:
+- the UI shows one page at a time, read through mmap (show_document)
+- the summarizer and editor take the handle in place of a string and read
+  the text (as_text) only for the duration of the call, in the worker
+
+Spool files are named by the upload's content hash, so every session that
+uploads the same file shares one copy, and a rerun reopens it without
+extracting or reading the text again. The prompt-size report shown under the
+text is computed once per budget and saved next to the spool file
+(compaction_report). The spool is evicted oldest-first by total size.
+
+Tuning: VA_LARGE_DOC_BYTES, VA_SPOOL_DIR, VA_SPOOL_MAX_BYTES.
+"""
+
+import json
+import math
+import mmap
+import os
+import tempfile
+from pathlib import Path
+
+import streamlit as st
+
+from . import prompt_compact
+from .doc_ingest import extract_uploaded_text, upload_key
+
+LARGE_DOCUMENT_BYTES = int(os.getenv("VA_LARGE_DOC_BYTES", 500_000))
+SPOOL_DIR = Path(os.getenv("VA_SPOOL_DIR", Path(tempfile.gettempdir()) / "virtual_assistant_spool"))
+SPOOL_MAX_BYTES = int(os.getenv("VA_SPOOL_MAX_BYTES", 1024 * 1024 * 1024))
+
+PAGE_BYTES = 20_000
+PAGE_ALIGN_BYTES = 2_000  # pages end at the next line break within this distance
+
+
+class SpooledText:
+    """Handle to extracted text stored in a spool file; cheap to keep in session state."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.size = self.path.stat().st_size
+
+    def __repr__(self):
+        return f"SpooledText({self.path.name}, {self.size:,} bytes)"
+
+    def read(self):
+        """The full text."""
+        return self.path.read_bytes().decode("utf-8")
+
+    @property
+    def page_count(self):
+        return max(1, math.ceil(self.size / PAGE_BYTES))
+
+    def page(self, index):
+        """Text of page `index` (0-based): about PAGE_BYTES, cut at a line break where possible."""
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            start = _page_boundary(view, index * PAGE_BYTES)
+            stop = _page_boundary(view, (index + 1) * PAGE_BYTES)
+            return view[start:stop].decode("utf-8")
+
+
+def _page_boundary(view, offset):
+    """First line start (or, failing that, UTF-8 character start) at or after offset."""
+    if offset <= 0:
+        return 0
+    if offset >= len(view):
+        return len(view)
+    newline = view.find(b"\n", offset - 1, offset + PAGE_ALIGN_BYTES)
+    if newline != -1:
+        return newline + 1
+    while offset < len(view) and view[offset] & 0xC0 == 0x80:  # UTF-8 continuation byte
+        offset += 1
+    return offset
+
+
+def as_text(source):
+    """The text of a str or SpooledText; AI helpers accept either."""
+    return source.read() if isinstance(source, SpooledText) else source
+
+
+def describe(source):
+    """Short size description for job labels."""
+    if isinstance(source, SpooledText):
+        return f"{source.size / 1e6:.1f} MB document"
+    return f"{len(source):,} characters"
+
+
+def compaction_report(source, budget=None, keep_layout=False):
+    """prompt_compact report for a str or SpooledText.
+
+    A spooled document's report is saved next to its spool file, so the text
+    is read and compacted once per budget, not on every rerun.
+    """
+    if not isinstance(source, SpooledText):
+        return prompt_compact.compaction_report(source, budget, keep_layout=keep_layout)
+    layout = "-layout" if keep_layout else ""
+    path = source.path.with_suffix(f".report-{budget}{layout}.json")
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    report = prompt_compact.compact_text(source.read(), budget, keep_layout=keep_layout)[1]
+    try:
+        path.write_text(json.dumps(report), encoding="utf-8")
+    except OSError:
+        pass  # best-effort, like the spool itself
+    return report
+
+
+# --- Spool store ---
+def _evict_spool():
+    files = sorted(SPOOL_DIR.glob("*.txt"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in files)
+    while files and total > SPOOL_MAX_BYTES:
+        oldest = files.pop(0)
+        total -= oldest.stat().st_size
+        oldest.unlink(missing_ok=True)
+        for report in SPOOL_DIR.glob(f"{oldest.stem}.report-*.json"):
+            report.unlink(missing_ok=True)
+
+
+def load_upload(uploaded_file, progress=None):
+    """Extracted text of an upload: a str, or a SpooledText when it exceeds LARGE_DOCUMENT_BYTES."""
+    path = SPOOL_DIR / f"{upload_key(uploaded_file)}.txt"
+    try:
+        os.utime(path)  # already spooled: mark as recently used
+        return SpooledText(path)
+    except OSError:
+        pass
+
+    text = extract_uploaded_text(uploaded_file, progress)
+    data = text.encode("utf-8")
+    if len(data) < LARGE_DOCUMENT_BYTES:
+        return text
+    try:
+        SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        _evict_spool()
+        return SpooledText(path)
+    except OSError:
+        return text  # no usable spool directory: fall back to the in-memory text
+
+
+# --- UI ---
+def show_document(doc, key):
+    """Paginated, read-only view of a spooled document."""
+    st.info(
+        f"📚 Large document ({doc.size / 1e6:.1f} MB of text). It is kept on the server and shown "
+        f"one page at a time; summarizing and editing use the full text."
+    )
+    page = 1
+    if doc.page_count > 1:
+        page = st.number_input(f"Page (of {doc.page_count:,})", min_value=1, max_value=doc.page_count,
+                               value=1, step=1, key=f"{key}_page")
+    with st.container(height=250):
+        st.text(doc.page(page - 1))
+
+
+def show_compaction_report(source, budget=None, keep_layout=False, limit="option"):
+    """Caption with the prompt size before/after compaction, and a warning if the budget cuts text."""
+    report = compaction_report(source, budget, keep_layout)
+    caption = f"≈ {report['tokens_before']:,} tokens → {report['tokens_after']:,} sent to the AI"
+    if report["tokens_saved"]:
+        removed = "page headers/footers" if keep_layout else "page headers/footers and repeats"
+        caption += f" ({report['tokens_saved']:,} saved by removing {removed})"
+    st.caption(caption)
+    if report["truncated"]:
+        st.warning(f"⚠️ The text exceeds the {budget:,}-token limit for this {limit}: "
+                   f"the last ≈ {report['tokens_truncated']:,} tokens will be cut.")
+    return report
@@ -0,0 +1,151 @@
+"""
+Background jobs for long-running work.
+
+Long summaries, edits and OCR batches run on a shared thread pool instead of
+the Streamlit script thread, so widget changes and tab switches neither
+abort nor repeat them. Each session keeps its jobs in st.session_state; a
+polling fragment (show_jobs) renders progress, a Cancel button and, once a
+job is done, its result via a tab-supplied renderer.
+
+A job function receives the Job as its first argument and should call
+job.report(...) as it goes; report() raises JobCancelled once the user has
+asked to cancel, so cancellation takes effect at the next progress point.
+
+Tuning: VA_JOB_WORKERS (threads shared by all sessions).
+"""
+
+import contextvars
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+JOB_WORKERS = int(os.getenv("VA_JOB_WORKERS", 4))
+POLL_SECONDS = 1.0
+MAX_JOBS_PER_SESSION = 20
+SESSION_KEY = "background_jobs"
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="va-job")
+_ids = itertools.count(1)
+
+ACTIVE = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when cancellation was requested."""
+
+
+class Job:
+    """State of one background job. Workers write it; the script thread only reads it."""
+
+    def __init__(self, kind, label):
+        self.id = next(_ids)
+        self.kind = kind
+        self.label = label
+        self.status = "queued"
+        self.progress = None  # 0..1, or None when unknown
+        self.message = ""
+        self.partial = ""  # streamed text so far, for jobs that stream
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ACTIVE
+
+    def report(self, done=None, total=None, message=None):
+        """Update progress; raises JobCancelled if cancellation was requested."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        if done is not None and total:
+            self.progress = min(done / total, 1.0)
+        if message is not None:
+            self.message = message
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():  # never started
+            self.status = "cancelled"
+            self.finished = time.time()
+
+    def _run(self, fn, args, kwargs):
+        if self._cancel.is_set():
+            self.status = "cancelled"
+            return
+        self.status = "running"
+        try:
+            self.result = fn(self, *args, **kwargs)
+            self.status, self.progress = "done", 1.0
+        except JobCancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            self.status, self.error = "failed", e
+        finally:
+            self.finished = time.time()
+
+
+def session_jobs():
+    """This session's jobs (id -> Job), oldest first."""
+    return st.session_state.setdefault(SESSION_KEY, {})
+
+
+def submit(kind, label, fn, *args, **kwargs):
+    """Run fn(job, *args, **kwargs) in the background and register the job in this session."""
+    jobs = session_jobs()
+    finished = [job_id for job_id, job in jobs.items() if not job.active]
+    for job_id in finished[:max(0, len(jobs) + 1 - MAX_JOBS_PER_SESSION)]:
+        del jobs[job_id]
+
+    job = Job(kind, label)
+    # Workers run in a copy of the caller's context (keeps the metrics tab label)
+    job.future = _executor.submit(contextvars.copy_context().run, job._run, fn, args, kwargs)
+    jobs[job.id] = job
+    return job
+
+
+# --- UI ---
+def _render_jobs(kind, render_result, polling):
+    jobs = [job for job in session_jobs().values() if job.kind == kind]
+    active = any(job.active for job in jobs)
+    if polling and not active:
+        st.rerun()  # everything finished: one full rerun turns polling off
+
+    for job in reversed(jobs):
+        with st.container(border=True):
+            st.markdown(f"**{job.label}** — {job.status}")
+            if job.active:
+                if job.progress is not None:
+                    st.progress(job.progress, text=job.message or None)
+                elif job.message:
+                    st.caption(job.message)
+                if job.partial:
+                    st.text(job.partial[-2000:])
+                if st.button("✖️ Cancel", key=f"job_cancel_{job.id}"):
+                    job.cancel()
+                    st.rerun(scope="fragment")
+                continue
+
+            if job.status == "done":
+                render_result(job)
+            elif job.status == "failed":
+                st.error(f"⚠️ {job.error}")
+            if st.button("Dismiss", key=f"job_dismiss_{job.id}"):
+                session_jobs().pop(job.id, None)
+                st.rerun(scope="fragment")
+
+
+def show_jobs(kind, render_result):
+    """List this session's jobs of `kind`, refreshing every POLL_SECONDS while any is running.
+
+    render_result(job) draws a finished job's result; widget keys should
+    include job.id.
+    """
+    polling = any(job.active for job in session_jobs().values() if job.kind == kind)
+    st.fragment(_render_jobs, run_every=POLL_SECONDS if polling else None)(kind, render_result, polling)
@@ -0,0 +1,161 @@
+"""
+Exact-match cache for LLM responses.
+
+Responses are keyed on (model, messages, temperature, extra options) so a
+Streamlit rerun or re-click with identical inputs returns instantly instead of
+calling the API again. Two backends are available:
+- MemoryBackend: in-process LRU (default)
+- SQLiteBackend: on-disk, shared between processes and restarts
+
+Configure with VA_LLM_CACHE=memory|sqlite|off, VA_LLM_CACHE_TTL (seconds)
+and VA_LLM_CACHE_SIZE (max entries).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("VA_CACHE_DIR", Path.home() / ".cache" / "virtual_assistant"))
+DEFAULT_TTL = int(os.getenv("VA_LLM_CACHE_TTL", 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("VA_LLM_CACHE_SIZE", 2000))
+
+
+def make_cache_key(model, messages, temperature, **options):
+    """Stable hash of everything that determines a completion."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "options": options},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- Backends ---
+class MemoryBackend:
+    """In-process LRU of (value, expires_at) pairs."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """On-disk cache table, evicting least recently used rows past max_entries."""
+
+    def __init__(self, path=CACHE_DIR / "llm_cache.sqlite3", max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT, expires_at REAL, accessed_at REAL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now + ttl, now)
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+# --- Cache front-end ---
+class ResponseCache:
+    """TTL cache over a pluggable backend, with hit/miss counters."""
+
+    def __init__(self, backend=None, ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.backend) if self.backend is not None else 0,
+        }
+
+
+def _build_cache():
+    kind = os.getenv("VA_LLM_CACHE", "memory").lower()
+    if kind == "sqlite":
+        return ResponseCache(SQLiteBackend())
+    if kind == "off":
+        return ResponseCache(None)
+    return ResponseCache(MemoryBackend())
+
+
+response_cache = _build_cache()
+
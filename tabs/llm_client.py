@@ -0,0 +1,228 @@
+"""
+Shared OpenAI client layer.
+
+All tabs go through this module instead of building their own OpenAI()
+clients:
+- one client with a pooled HTTP connection set, reused across tabs and sessions
+- per-call timeouts
+- jittered exponential retry on 429 / 5xx / connection errors
+- a global concurrency limit, so a slow API causes fast "overloaded" errors
+  instead of piles of stuck sessions
+- failures surface as LLMError with a status and a retryable flag
+
+Responses go through the exact-match cache in llm_cache. Every call is
+recorded as an "api_call" metrics span with the token usage reported by the API,
+labelled with the model and the llm_router route that chose it; completions
+cut off by max_tokens are also labelled truncated.
+
+Tuning: VA_LLM_TIMEOUT, VA_LLM_MAX_RETRIES, VA_LLM_MAX_CONCURRENCY,
+VA_LLM_QUEUE_TIMEOUT.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+import httpx
+import openai
+import streamlit as st
+from openai import OpenAI
+
+from . import metrics
+from .llm_cache import make_cache_key, response_cache
+
+REQUEST_TIMEOUT = float(os.getenv("VA_LLM_TIMEOUT", 60))
+CONNECT_TIMEOUT = 10.0
+MAX_RETRIES = int(os.getenv("VA_LLM_MAX_RETRIES", 3))
+MAX_CONCURRENCY = int(os.getenv("VA_LLM_MAX_CONCURRENCY", 16))
+QUEUE_TIMEOUT = float(os.getenv("VA_LLM_QUEUE_TIMEOUT", 30))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+
+
+class LLMError(Exception):
+    """A failed LLM call, after retries.
+
+    kind is one of: "overloaded", "timeout", "connection", "rate_limit",
+    "server", "client", "config".
+    """
+
+    def __init__(self, message, kind="client", status=None, retryable=False):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+        self.retryable = retryable
+
+
+def _load_api_key():
+    # The environment first (headless use, benchmarks), then Streamlit secrets.
+    # load_if_toml_exists() keeps st.secrets from drawing a "No secrets found"
+    # error, which get_client's cache would record and replay in worker threads.
+    key = os.getenv("OPENAI_API_KEY")
+    if key:
+        return key
+    try:
+        if st.secrets.load_if_toml_exists() and "OPENAI_API_KEY" in st.secrets:
+            return st.secrets["OPENAI_API_KEY"]
+    except Exception:
+        pass
+    return None
+
+
+@st.cache_resource(show_spinner=False)  # one pooled client per process (and key); worker threads call it too
+def get_client(api_key):
+    http_client = openai.DefaultHttpxClient(
+        limits=httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+    # Retries are handled here so they share the concurrency limit
+    return OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+
+def _to_llm_error(e):
+    if isinstance(e, (openai.APITimeoutError, httpx.TimeoutException)):
+        return LLMError("The AI service timed out.", kind="timeout", retryable=True)
+    if isinstance(e, (openai.APIConnectionError, httpx.HTTPError)):
+        return LLMError("Could not reach the AI service.", kind="connection", retryable=True)
+    if isinstance(e, openai.APIStatusError):
+        status = e.status_code
+        if status == 429:
+            return LLMError("The AI service is rate limiting requests.", kind="rate_limit", status=status, retryable=True)
+        if status >= 500:
+            return LLMError(f"The AI service failed ({status}).", kind="server", status=status, retryable=True)
+        return LLMError(f"The AI service rejected the request ({status}): {e.message}", kind="client", status=status)
+    return LLMError(str(e), kind="config")
+
+
+def _retry_delay(attempt, error):
+    retry_after = None
+    response = getattr(error.__cause__, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after", ""))
+        except ValueError:
+            pass
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    # Full jitter: uniform between 0 and the exponential cap
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _create(**params):
+    """Call chat.completions.create with retries. The caller must hold a slot."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return get_client(_load_api_key()).chat.completions.create(**params)
+        except openai.OpenAIError as e:
+            error = _to_llm_error(e)
+            error.__cause__ = e
+            if not error.retryable or attempt == MAX_RETRIES:
+                raise error from e
+        time.sleep(_retry_delay(attempt, error))
+
+
+def _acquire_slot():
+    if not _slots.acquire(timeout=QUEUE_TIMEOUT):
+        raise LLMError("Too many AI requests in flight; please try again shortly.",
+                       kind="overloaded", retryable=True)
+
+
+def _cache_key(model, messages, temperature, cache_options, params):
+    # An output cap changes the completion, so it is part of the key
+    limits = {"max_tokens": params["max_tokens"]} if "max_tokens" in params else {}
+    return make_cache_key(model, messages, temperature, **limits, **(cache_options or {}))
+
+
+def chat_completion(model, messages, temperature, cache_options=None, route="default", **params):
+    """Return the completion text, using the response cache when possible.
+
+    Raises LLMError if the call fails after retries.
+    """
+    key = _cache_key(model, messages, temperature, cache_options, params)
+    with metrics.span("api_call", model=model, route=route, cache="hit") as span:
+        text = response_cache.get(key)
+        if text is not None:
+            return text
+        span.labels["cache"] = "miss"
+
+        _acquire_slot()
+        try:
+            response = _create(model=model, messages=messages, temperature=temperature, **params)
+        finally:
+            _slots.release()
+        if response.usage:
+            span.add_tokens(input=response.usage.prompt_tokens, output=response.usage.completion_tokens)
+        if response.choices[0].finish_reason == "length":
+            span.labels["truncated"] = "true"
+    text = response.choices[0].message.content.strip()
+    response_cache.set(key, text)
+    return text
+
+
+def chat_completion_choices(model, messages, temperature, n, cache_options=None, route="default", **params):
+    """Return n alternative completion texts from one API call (the `n` parameter).
+
+    The texts are cached together as one JSON list. Raises LLMError if the
+    call fails after retries.
+    """
+    key = _cache_key(model, messages, temperature, {**(cache_options or {}), "n": n}, params)
+    with metrics.span("api_call", model=model, route=route, cache="hit", n=n) as span:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+        span.labels["cache"] = "miss"
+
+        _acquire_slot()
+        try:
+            response = _create(model=model, messages=messages, temperature=temperature, n=n, **params)
+        finally:
+            _slots.release()
+        if response.usage:
+            span.add_tokens(input=response.usage.prompt_tokens, output=response.usage.completion_tokens)
+        if any(choice.finish_reason == "length" for choice in response.choices):
+            span.labels["truncated"] = "true"
+    texts = [choice.message.content.strip() for choice in sorted(response.choices, key=lambda c: c.index)]
+    response_cache.set(key, json.dumps(texts, ensure_ascii=False))
+    return texts
+
+
+def stream_chat_completion(model, messages, temperature, cache_options=None, route="default", **params):
+    """Yield the completion text incrementally; the full text is cached once the stream ends.
+
+    Raises LLMError if the call fails after retries or the stream breaks.
+    """
+    key = _cache_key(model, messages, temperature, cache_options, params)
+    with metrics.span("api_call", model=model, route=route, cache="hit", stream=True) as span:
+        text = response_cache.get(key)
+        if text is not None:
+            yield text
+            return
+        span.labels["cache"] = "miss"
+
+        # Ask for a final usage chunk so streamed calls report tokens too
+        params.setdefault("stream_options", {"include_usage": True})
+        _acquire_slot()
+        try:
+            stream = _create(model=model, messages=messages, temperature=temperature, stream=True, **params)
+            pieces = []
+            try:
+                for chunk in stream:
+                    if chunk.usage:
+                        span.add_tokens(input=chunk.usage.prompt_tokens, output=chunk.usage.completion_tokens)
+                    if chunk.choices and chunk.choices[0].finish_reason == "length":
+                        span.labels["truncated"] = "true"
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        pieces.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            except (openai.OpenAIError, httpx.HTTPError) as e:
+                raise _to_llm_error(e) from e
+            finally:
+                stream.close()
+        finally:
+            _slots.release()
+    response_cache.set(key, "".join(pieces).strip())
@@ -0,0 +1,81 @@
+"""
+Model routing and output token budgets.
+
+route() picks the model and the max_tokens cap for each AI call from the
+task, the user's length/type option and the prompt size:
+- ROUTES gives each (task, option) a model tier and an output cap, so a
+  "Very short" summary cannot run on for hundreds of tokens
+- prompts over LARGE_INPUT_TOKENS for their task move up to the large model
+  (long key points are more to weave together), as do the email types in
+  LARGE_MODEL_EMAIL_TYPES, where tone matters most
+- edits return about as much text as they get, so their cap scales with the
+  input instead of being fixed
+
+The route name is recorded as the `route` label of every "api_call" metrics
+span, next to model, latency and token counts, so the table can be tuned
+from the metrics panel or /metrics.
+
+Tuning: VA_MODEL_SMALL, VA_MODEL_LARGE.
+"""
+
+import os
+
+from .prompt_compact import count_tokens
+
+MODELS = {
+    "small": os.getenv("VA_MODEL_SMALL", "gpt-4o-mini"),
+    "large": os.getenv("VA_MODEL_LARGE", "gpt-4o"),
+}
+
+# task -> option -> (model tier, max output tokens); None as option is the task default
+ROUTES = {
+    "email": {
+        "Short (3–4 lines)": ("small", 200),
+        "Medium (1 paragraph)": ("small", 400),
+        "Detailed (2–3 paragraphs)": ("large", 900),
+        None: ("small", 400),
+    },
+    "summary": {
+        "Very short (1–2 lines)": ("small", 120),
+        "Short (3–5 lines)": ("small", 350),
+        "Detailed paragraph": ("small", 800),
+    },
+    "summary_chunk": {None: ("small", 1000)},  # map-reduce partial summaries
+    "edit": {None: ("small", None)},
+    "edit_paragraph": {None: ("small", None)},
+}
+LARGE_MODEL_EMAIL_TYPES = {"Apology", "Marketing"}
+LARGE_INPUT_TOKENS = {"email": 600}
+
+# Edits: max_tokens = input tokens * ratio + slack, within the model's output limit
+EDIT_OUTPUT_RATIO = 1.5
+EDIT_OUTPUT_SLACK = 200
+MAX_OUTPUT_TOKENS = 16_000
+
+
+def prompt_tokens(messages, model=MODELS["small"]):
+    return sum(count_tokens(m["content"], model) for m in messages)
+
+
+def route(task, option=None, messages=None, input_tokens=None, email_type=None):
+    """Return the model, max_tokens and route name for one call, as chat_completion kwargs.
+
+    Pass the prompt as messages, or its size as input_tokens when it is
+    already known. max_tokens is omitted when the route has no cap.
+    """
+    options = ROUTES[task]
+    tier, max_tokens = options.get(option, options.get(None, ("small", None)))
+    if input_tokens is None:
+        input_tokens = prompt_tokens(messages) if messages else 0
+
+    if input_tokens > LARGE_INPUT_TOKENS.get(task, float("inf")):
+        tier = "large"
+    if task == "email" and email_type in LARGE_MODEL_EMAIL_TYPES:
+        tier = "large"
+    if task in ("edit", "edit_paragraph"):
+        max_tokens = min(int(input_tokens * EDIT_OUTPUT_RATIO) + EDIT_OUTPUT_SLACK, MAX_OUTPUT_TOKENS)
+
+    params = {"model": MODELS[tier], "route": f"{task}:{option}" if option else task}
+    if max_tokens:
+        params["max_tokens"] = max_tokens
+    return params
@@ -0,0 +1,241 @@
+"""
+Lightweight per-stage instrumentation.
+
+Code wraps each stage in a span:
+
+    with metrics.span("extract", format="pdf") as s:
+        ...
+        s.add_tokens(input=120, output=40)
+
+Each span records wall time, input/output tokens, resident-memory growth and
+whether it raised. Spans are aggregated per (stage, labels) and the most recent
+ones are kept as events. The tab being rendered is attached automatically as
+the `tab` label (see tab_context), so nested stages can be told apart per tab.
+
+Exports:
+- to_prometheus(): Prometheus text exposition format
+- to_jsonl(): one JSON object per recent span
+- VA_METRICS_FILE=path appends every span to a JSON-lines file
+- VA_METRICS_PORT=port serves /metrics and /metrics.jsonl (start_http_server)
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MAX_EVENTS = 1000
+METRICS_FILE = os.getenv("VA_METRICS_FILE")
+
+_current_tab = contextvars.ContextVar("va_metrics_tab", default="")
+
+
+def rss_bytes():
+    """Resident memory of this process (peak RSS where the current value is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    return 0
+
+
+class Span:
+    """One timed stage; use add_tokens() to attach token counts."""
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.seconds = 0.0
+        self.rss_delta = 0
+        self.error = None
+
+    def add_tokens(self, input=0, output=0):
+        self.input_tokens += input or 0
+        self.output_tokens += output or 0
+
+
+class MetricsRegistry:
+    """Thread-safe aggregates per (stage, labels) plus a bounded log of recent spans."""
+
+    def __init__(self, max_events=MAX_EVENTS, log_path=METRICS_FILE):
+        self.log_path = log_path
+        self._stats = {}
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        key = (span.stage, tuple(sorted(span.labels.items())))
+        event = {
+            "ts": time.time(),
+            "stage": span.stage,
+            **span.labels,
+            "seconds": round(span.seconds, 6),
+            "input_tokens": span.input_tokens,
+            "output_tokens": span.output_tokens,
+            "rss_delta_bytes": span.rss_delta,
+            "error": span.error,
+        }
+        with self._lock:
+            stats = self._stats.setdefault(key, {
+                "count": 0, "errors": 0, "seconds_sum": 0.0, "seconds_max": 0.0,
+                "input_tokens": 0, "output_tokens": 0, "rss_delta_max": 0,
+            })
+            stats["count"] += 1
+            stats["errors"] += span.error is not None
+            stats["seconds_sum"] += span.seconds
+            stats["seconds_max"] = max(stats["seconds_max"], span.seconds)
+            stats["input_tokens"] += span.input_tokens
+            stats["output_tokens"] += span.output_tokens
+            stats["rss_delta_max"] = max(stats["rss_delta_max"], span.rss_delta)
+            self._events.append(event)
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                except OSError:
+                    pass  # metrics are best-effort
+
+    def summary(self):
+        """One row per (stage, labels) with totals and the mean duration."""
+        with self._lock:
+            items = list(self._stats.items())
+        rows = []
+        for (stage, labels), stats in sorted(items):
+            rows.append({
+                "stage": stage,
+                **dict(labels),
+                **stats,
+                "seconds_mean": stats["seconds_sum"] / stats["count"],
+            })
+        return rows
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._events.clear()
+
+    def to_jsonl(self):
+        return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in self.events())
+
+    def to_prometheus(self):
+        with self._lock:
+            items = sorted(self._stats.items())
+        metrics = [
+            ("va_stage_calls_total", "counter", "Spans recorded per stage.", lambda s: s["count"]),
+            ("va_stage_errors_total", "counter", "Spans that raised.", lambda s: s["errors"]),
+            ("va_stage_seconds_sum", "counter", "Total wall time per stage.", lambda s: s["seconds_sum"]),
+            ("va_stage_seconds_max", "gauge", "Slowest span per stage.", lambda s: s["seconds_max"]),
+            ("va_stage_input_tokens_total", "counter", "Prompt tokens per stage.", lambda s: s["input_tokens"]),
+            ("va_stage_output_tokens_total", "counter", "Completion tokens per stage.", lambda s: s["output_tokens"]),
+            ("va_stage_rss_delta_bytes_max", "gauge", "Largest resident-memory growth during a span.",
+             lambda s: s["rss_delta_max"]),
+        ]
+        lines = []
+        for name, kind, help_text, value in metrics:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for (stage, labels), stats in items:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in (("stage", stage),) + labels)
+                lines.append(f"{name}{{{label_text}}} {value(stats)}")
+        lines += ["# HELP va_process_resident_memory_bytes Resident memory of the app process.",
+                  "# TYPE va_process_resident_memory_bytes gauge",
+                  f"va_process_resident_memory_bytes {rss_bytes()}"]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(stage, **labels):
+    """Time a stage; labels become Prometheus labels. Exceptions are recorded and re-raised."""
+    tab = _current_tab.get()
+    if tab and "tab" not in labels:
+        labels["tab"] = tab
+    record = Span(stage, {k: str(v) for k, v in labels.items()})
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.seconds = time.perf_counter() - start
+        record.rss_delta = max(0, rss_bytes() - rss_before)
+        registry.record(record)
+
+
+def record(stage, seconds, **labels):
+    """Record an already-measured duration (e.g. app startup) as a span."""
+    entry = Span(stage, {k: str(v) for k, v in labels.items()})
+    entry.seconds = seconds
+    registry.record(entry)
+
+
+@contextmanager
+def tab_context(tab):
+    """Attach `tab` as a label to every span opened inside this block (including to_thread workers)."""
+    token = _current_tab.set(tab)
+    try:
+        yield
+    finally:
+        _current_tab.reset(token)
+
+
+# --- Scrape endpoint ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.jsonl"):
+            body, content_type = registry.to_jsonl(), "application/x-ndjson"
+        elif self.path.startswith("/metrics"):
+            body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve /metrics (Prometheus) and /metrics.jsonl from a daemon thread; safe to call on every rerun."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
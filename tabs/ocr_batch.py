@@ -0,0 +1,213 @@
+"""
+Batch OCR pipeline.
+
+Takes many uploaded files (images, multi-frame TIFFs, scanned PDFs), splits
+them into pages, runs preprocess_image in a process pool and feeds EasyOCR
+page by page, streaming (file, page, text, readable, structured) results back
+to the UI as they complete.
+"""
+
+import csv
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import streamlit as st
+from PIL import Image, ImageSequence
+
+from . import jobs
+from .ocr_cache import content_key, fingerprint, ocr_cache
+from .receipt_parser import parse_text
+from .tab_ocr import DEFAULT_PRESET, get_easyocr_reader, preprocess_image
+
+# Optional: scanned PDF support needs pdf2image (and poppler)
+try:
+    from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+OCR_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+PDF_DPI = 200
+RECOGNIZER_BATCH = 16  # text boxes per recognizer forward pass
+
+
+# =============================
+# 📄 Page Rasterization
+# =============================
+def iter_pages(name, data):
+    """Yield (page_number, PIL image) for every page/frame of an uploaded file."""
+    if name.lower().endswith(".pdf"):
+        if not PDF_AVAILABLE:
+            raise RuntimeError("Scanned PDF support needs the pdf2image package and poppler.")
+        page_count = pdfinfo_from_bytes(data)["Pages"]
+        for page in range(1, page_count + 1):
+            # Rasterize one page at a time to keep memory flat on long scans
+            yield page, convert_from_bytes(data, dpi=PDF_DPI, first_page=page, last_page=page)[0]
+        return
+
+    with Image.open(io.BytesIO(data)) as img:
+        for page, frame in enumerate(ImageSequence.Iterator(img), start=1):
+            yield page, frame.convert("RGB")
+
+
+def _iter_all_pages(files):
+    # A file that cannot be opened becomes one failed page instead of stopping the batch
+    for name, data in files:
+        try:
+            for page, image in iter_pages(name, data):
+                yield name, page, content_key(data, page), image
+        except Exception as e:
+            yield name, 0, None, e
+
+
+# =============================
+# ⚙️ Batch Pipeline
+# =============================
+def run_batch_ocr(files, workers=OCR_WORKERS, preset=DEFAULT_PRESET):
+    """OCR every page of files, a list of (name, bytes), preprocessed with preset.
+
+    Preprocessing runs in a process pool with a bounded look-ahead so pages
+    are rasterized only slightly ahead of recognition. Pages found in the OCR
+    cache skip preprocessing and recognition. Yields one dict per page, in
+    input order.
+    """
+    reader = get_easyocr_reader()
+    pages = _iter_all_pages(files)
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        def fill():
+            while len(pending) < 2 * workers:
+                try:
+                    name, page, key, image = next(pages)
+                except StopIteration:
+                    return
+                if isinstance(image, Exception):
+                    pending.append((name, page, key, None, image))
+                    continue
+                fp = fingerprint(image)
+                cached = ocr_cache.lookup(key, fp)
+                job = cached if cached is not None else pool.submit(preprocess_image, image, preset)
+                pending.append((name, page, key, fp, job))
+
+        fill()
+        while pending:
+            name, page, key, fp, job = pending.popleft()
+            fill()
+            try:
+                if isinstance(job, Exception):
+                    raise job
+                if isinstance(job, dict):  # cache hit
+                    text, readable, structured = job["text"], job["readable"], job["structured"]
+                else:
+                    result = reader.readtext(job.result(), detail=0, paragraph=True, batch_size=RECOGNIZER_BATCH)
+                    text = "\n".join(result).strip()
+                    readable, structured = parse_text(text)
+                    ocr_cache.store(key, fp, text, readable, structured)
+                yield {"file": name, "page": page, "text": text, "readable": readable, "structured": structured}
+            except Exception as e:
+                yield {"file": name, "page": page, "error": str(e)}
+
+
+# =============================
+# 📦 Combined Output
+# =============================
+def results_to_csv(results):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["file", "page", "store", "date", "total", "items", "error"])
+    for r in results:
+        s = r.get("structured") or {}
+        writer.writerow([
+            r["file"], r["page"], s.get("store"), s.get("date"), s.get("total"),
+            " | ".join(s.get("items") or []), r.get("error", ""),
+        ])
+    return buffer.getvalue()
+
+
+def results_to_json(results):
+    return json.dumps(
+        [{"file": r["file"], "page": r["page"], "text": r.get("text"),
+          "structured": r.get("structured"), "error": r.get("error")} for r in results],
+        indent=2,
+    )
+
+
+# =============================
+# 🎨 Streamlit UI
+# =============================
+def _ocr_job(job, files, preset):
+    results = []
+    pages = run_batch_ocr(files, preset=preset)
+    try:
+        for r in pages:
+            results.append(r)
+            job.report(message=f"Processed {len(results)} pages (latest: {r['file']} p.{r['page']})")
+    finally:
+        pages.close()  # on cancel, shuts the preprocessing pool down
+    return results
+
+
+def _show_batch_summary(results, key_prefix="ocr_batch"):
+    failed = sum("error" in r for r in results)
+    st.success(f"✅ Extraction complete: {len(results) - failed} pages OK, {failed} failed.")
+    stats = ocr_cache.stats()
+    st.caption(
+        f"OCR cache: {stats['exact_hits']} exact / {stats['perceptual_hits']} perceptual hits, "
+        f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Download CSV", results_to_csv(results), file_name="ocr_batch.csv",
+                           key=f"{key_prefix}_csv")
+    with col2:
+        st.download_button("📥 Download JSON", results_to_json(results), file_name="ocr_batch.json",
+                           key=f"{key_prefix}_json")
+
+
+def _render_ocr_job(job):
+    _show_batch_summary(job.result, key_prefix=f"ocr_job_{job.id}")
+
+
+def show_batch_ocr_section(preset=DEFAULT_PRESET):
+    file_types = ["png", "jpg", "jpeg", "tiff", "tif", "bmp", "webp"] + (["pdf"] if PDF_AVAILABLE else [])
+    uploaded = st.file_uploader(
+        "Upload receipts, invoices or scanned PDFs",
+        type=file_types,
+        accept_multiple_files=True,
+        key="ocr_batch_upload",
+    )
+    if uploaded:
+        st.caption(f"{len(uploaded)} files selected. Pages are processed with {OCR_WORKERS} worker processes.")
+        background = st.checkbox(
+            "🕒 Run in background (keep using the app; results appear below when ready)",
+            key="ocr_batch_background",
+        )
+
+        if st.button("Extract Text from All", key="ocr_batch_run"):
+            files = [(f.name, f.getvalue()) for f in uploaded]
+            if background:
+                jobs.submit("ocr", f"OCR of {len(files)} files", _ocr_job, files, preset)
+            else:
+                results = []
+                status = st.empty()
+                try:
+                    with st.spinner("🔍 Extracting text using EasyOCR..."):
+                        for r in run_batch_ocr(files, preset=preset):
+                            results.append(r)
+                            status.caption(f"Processed {len(results)} pages (latest: {r['file']} p.{r['page']})")
+                            with st.expander(f"🧾 {r['file']} — page {r['page']}"):
+                                if "error" in r:
+                                    st.error(f"⚠️ OCR failed: {r['error']}")
+                                else:
+                                    st.text(r["readable"])
+                except Exception as e:  # the OCR model or worker pool failed; page errors are reported above
+                    st.error(f"⚠️ OCR failed: {e}")
+                else:
+                    _show_batch_summary(results)
+
+    jobs.show_jobs("ocr", _render_ocr_job)
@@ -0,0 +1,186 @@
+"""
+OCR result cache.
+
+Results are stored on disk keyed by a SHA-256 of the uploaded bytes and also
+indexed by a perceptual fingerprint of the image, so a re-encoded copy of the
+same scan (same pixel size, different file bytes) is a hit too. Receipts from
+one template differ only in a few digits, so a perceptual hit must pass three
+checks:
+- identical width and height (resized copies are not matched)
+- a dHash within MAX_DISTANCE bits, which only shortlists candidates
+- a pixel comparison at COMPARE_SIZE: no 8x8 tile may differ by more than
+  MAX_TILE_DIFF grey levels on average, so one changed digit is a miss
+The comparison image is kept as a lossless PNG next to the JSON entry.
+Entries hold the raw text plus the parse_text output and are evicted
+oldest-first once the entry or byte limit is exceeded.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+CACHE_DIR = Path(os.getenv("VA_CACHE_DIR", Path.home() / ".cache" / "virtual_assistant")) / "ocr"
+MAX_ENTRIES = 5000
+MAX_BYTES = 1024 * 1024 * 1024  # entries are ~1-2 MB with their comparison image
+HASH_SIZE = 16  # 16x16 = 256-bit dHash
+MAX_DISTANCE = 4  # Hamming distance (out of 256) for a candidate match
+MAX_CANDIDATES = 8  # pixel-compared per lookup, nearest hashes first
+COMPARE_SIZE = 2048  # longest side of the comparison image; small text must survive the downscale
+COMPARE_TILE = 8
+# On synthetic receipts, JPEG q80+ re-encodes score under 8; one changed digit in
+# 16px text on a 3000x4000 photo scores 12.5, larger text far more. Lower-quality
+# re-encodes of small images may miss, which only costs a fresh OCR run.
+MAX_TILE_DIFF = 8.0
+
+
+def content_key(data, page=1):
+    """SHA-256 of the file bytes, plus the page number for multi-page files."""
+    return f"{hashlib.sha256(data).hexdigest()}-{page}"
+
+
+def fingerprint(image):
+    """Perceptual fingerprint of a PIL image or NumPy array: (dhash, (width, height), comparison image)."""
+    img = np.asarray(image.convert("L")) if isinstance(image, Image.Image) else np.asarray(image)
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(img, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    phash = int.from_bytes(np.packbits(bits).tobytes(), "big")
+    height, width = img.shape
+    scale = min(1.0, COMPARE_SIZE / max(height, width))
+    compare = img if scale == 1.0 else cv2.resize(
+        img, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    return phash, (width, height), compare
+
+
+def _max_tile_diff(a, b):
+    """Largest mean absolute difference over COMPARE_TILE x COMPARE_TILE tiles."""
+    diff = cv2.absdiff(a, b).astype(np.float32)
+    tiles = cv2.resize(diff, (max(1, diff.shape[1] // COMPARE_TILE), max(1, diff.shape[0] // COMPARE_TILE)),
+                       interpolation=cv2.INTER_AREA)
+    return float(tiles.max())
+
+
+class OCRCache:
+    """Disk-backed OCR results with an in-memory perceptual-hash index."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        self._index = None  # key -> fingerprint
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _image_path(self, key):
+        return self.cache_dir / f"{key}.png"
+
+    def _load_index(self):
+        # key -> (dhash, (width, height)); comparison images stay on disk
+        if self._index is None:
+            self._index = {}
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    entry = json.loads(path.read_text(encoding="utf-8"))
+                    self._index[path.stem] = (entry["phash"], tuple(entry["size"]))
+                except (OSError, ValueError, KeyError, TypeError):  # unreadable or an older entry format
+                    path.unlink(missing_ok=True)
+                    self._image_path(path.stem).unlink(missing_ok=True)
+        return self._index
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # mark as recently used for eviction
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _match(self, index, fp):
+        # Same-size candidates by dHash distance, confirmed pixel by pixel
+        phash, size, compare = fp
+        candidates = sorted(
+            (distance, other_key)
+            for other_key, (other_hash, other_size) in index.items()
+            if other_size == size and (distance := (phash ^ other_hash).bit_count()) <= MAX_DISTANCE
+        )
+        for _, other_key in candidates[:MAX_CANDIDATES]:
+            other = cv2.imread(str(self._image_path(other_key)), cv2.IMREAD_GRAYSCALE)
+            if other is not None and other.shape == compare.shape \
+                    and _max_tile_diff(compare, other) <= MAX_TILE_DIFF:
+                return other_key
+        return None
+
+    def lookup(self, key, fp):
+        """Return the cached result dict (text, readable, structured) or None."""
+        with self._lock:
+            index = self._load_index()
+            entry = self._read(key) if key in index else None
+            if entry is not None:
+                self.exact_hits += 1
+                return entry
+            # Same-size re-encodes of a cached scan (resized copies never match)
+            match = self._match(index, fp)
+            entry = self._read(match) if match else None
+            if entry is not None:
+                self.perceptual_hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def store(self, key, fp, text, readable, structured):
+        phash, size, compare = fp
+        entry = {"phash": phash, "size": list(size), "text": text, "readable": readable,
+                 "structured": structured, "created": time.time()}
+        with self._lock:
+            index = self._load_index()
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                if not cv2.imwrite(str(self._image_path(key)), compare):
+                    return
+                self._path(key).write_text(json.dumps(entry), encoding="utf-8")
+                index[key] = (phash, size)
+                self._evict(index)
+            except OSError:
+                pass  # caching is best-effort
+
+    def _entry_bytes(self, path):
+        image = self._image_path(path.stem)
+        return path.stat().st_size + (image.stat().st_size if image.exists() else 0)
+
+    def _evict(self, index):
+        files = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        total = sum(self._entry_bytes(p) for p in files)
+        while files and (len(files) > self.max_entries or total > self.max_bytes):
+            oldest = files.pop(0)
+            total -= self._entry_bytes(oldest)
+            oldest.unlink(missing_ok=True)
+            self._image_path(oldest.stem).unlink(missing_ok=True)
+            index.pop(oldest.stem, None)
+
+    def stats(self):
+        hits = self.exact_hits + self.perceptual_hits
+        total = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "perceptual_hits": self.perceptual_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": len(self._index or {}),
+        }
+
+
+ocr_cache = OCRCache()
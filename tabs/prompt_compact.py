@@ -0,0 +1,188 @@
+"""
+Token-aware prompt compaction.
+
+Extracted documents (PDFs especially) carry a lot of text that costs tokens
+without adding meaning. compact_text removes it before an LLM call:
+- page headers/footers: short lines that recur at the top or bottom of many
+  pages (digits ignored, so "Annual Report 2024 | p. 7" and bare page numbers
+  match on every page); the first copy stays. Pages are the form-feed
+  separated parts of the text, as doc_ingest extracts PDFs; text without page
+  breaks has no headers to strip
+- runs of spaces and blank lines
+- paragraphs repeated verbatim
+then, given a budget, trims the result at a paragraph boundary and reports
+the tokens saved and the tokens cut separately.
+
+With keep_layout=True only page headers/footers are removed: whitespace,
+indentation and repeated paragraphs stay, for text the user wrote and expects
+back in full (editing).
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated
+at ~4 characters per token. compaction_report gives the UI the sizes without
+keeping the text: reports are remembered by a digest of the text.
+"""
+
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+BOILERPLATE_MAX_CHARS = 80  # longer lines are content, even if repeated
+BOILERPLATE_MIN_REPEATS = 3
+BOILERPLATE_MIN_PAGE_SHARE = 0.4  # of pages a header/footer must appear on (odd/even headers: half each)
+BOILERPLATE_EDGE_LINES = 3  # non-blank lines at the top and bottom of a page checked for headers/footers
+DEDUP_MIN_CHARS = 40  # short paragraphs ("Thanks,", "Yes.") may legitimately repeat
+REPORT_CACHE_SIZE = 256
+
+_PAGE_BREAK_RE = re.compile(r'\n?\f\n?')
+_DIGITS_RE = re.compile(r'\d+')
+_SPACES_RE = re.compile(r'[ \t\xa0]+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:  # e.g. the encoding file cannot be downloaded
+            return None
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    """Token count for model, exact with tiktoken and estimated without it."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+# --- Cleanup passes ---
+def _edge_lines(lines):
+    """Indexes of the first and last BOILERPLATE_EDGE_LINES non-blank lines of a page."""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return set(filled[:BOILERPLATE_EDGE_LINES] + filled[-BOILERPLATE_EDGE_LINES:])
+
+
+def _shape(line):
+    stripped = line.strip()
+    if 0 < len(stripped) <= BOILERPLATE_MAX_CHARS:
+        return _DIGITS_RE.sub("#", stripped)
+    return None
+
+
+def strip_boilerplate(text):
+    """Drop all but the first copy of short lines repeated at the top or bottom of many pages.
+
+    Only lines at page edges are candidates, so repeated lines inside a page
+    ("Step 1", "Step 2", table values) are content and always kept.
+    """
+    pages = _PAGE_BREAK_RE.split(text)
+    if len(pages) < BOILERPLATE_MIN_REPEATS:
+        return "\n".join(pages)
+    pages = [page.split("\n") for page in pages]
+    edges = [_edge_lines(lines) for lines in pages]
+    counts = Counter(
+        shape for lines, edge in zip(pages, edges)
+        for shape in {_shape(lines[i]) for i in edge} - {None}
+    )
+    min_pages = max(BOILERPLATE_MIN_REPEATS, len(pages) * BOILERPLATE_MIN_PAGE_SHARE)
+    kept_pages, seen = [], set()
+    for lines, edge in zip(pages, edges):
+        kept = []
+        for i, line in enumerate(lines):
+            shape = _shape(line) if i in edge else None
+            if shape is not None and counts[shape] >= min_pages:
+                # Keep one copy: it may be the document title
+                if shape in seen:
+                    continue
+                seen.add(shape)
+            kept.append(line)
+        kept_pages.append("\n".join(kept))
+    return "\n".join(kept_pages)
+
+
+def normalize_whitespace(text):
+    text = _SPACES_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def dedupe_paragraphs(text):
+    """Keep the first copy of each paragraph that appears more than once."""
+    seen = set()
+    kept = []
+    for paragraph in text.split("\n\n"):
+        key = " ".join(paragraph.split()).casefold()
+        if len(key) >= DEDUP_MIN_CHARS:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept)
+
+
+def trim_to_budget(text, budget, model="gpt-4o-mini"):
+    """Cut text to at most budget tokens, preferring a paragraph or line boundary."""
+    tokens = count_tokens(text, model)
+    while tokens > budget:
+        cut = int(len(text) * budget / tokens * 0.98)
+        boundary = max(text.rfind("\n\n", 0, cut), text.rfind("\n", 0, cut))
+        text = text[:boundary if boundary > cut * 0.8 else cut].rstrip()
+        tokens = count_tokens(text, model)
+    return text
+
+
+# --- Entry points ---
+def compact_text(text, budget=None, model="gpt-4o-mini", keep_layout=False):
+    """Return (compacted_text, report).
+
+    report has tokens_before, tokens_after, tokens_saved (by the cleanup
+    passes), tokens_truncated (cut to fit the budget) and truncated.
+    """
+    tokens_before = count_tokens(text, model)
+    compacted = strip_boilerplate(text)
+    if not keep_layout:
+        compacted = dedupe_paragraphs(normalize_whitespace(compacted))
+    tokens_after = tokens_compacted = count_tokens(compacted, model)
+    truncated = budget is not None and tokens_after > budget
+    if truncated:
+        compacted = trim_to_budget(compacted, budget, model)
+        tokens_after = count_tokens(compacted, model)
+    return compacted, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_compacted,
+        "tokens_truncated": tokens_compacted - tokens_after,
+        "truncated": truncated,
+    }
+
+
+_reports = OrderedDict()
+_reports_lock = threading.Lock()
+
+
+def compaction_report(text, budget=None, model="gpt-4o-mini", keep_layout=False):
+    """compact_text's report alone, cached by a digest of the text so reruns neither recompact nor pin it."""
+    key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), budget, model, keep_layout)
+    with _reports_lock:
+        if key in _reports:
+            _reports.move_to_end(key)
+            return _reports[key]
+    report = compact_text(text, budget, model, keep_layout)[1]
+    with _reports_lock:
+        _reports[key] = report
+        while len(_reports) > REPORT_CACHE_SIZE:
+            _reports.popitem(last=False)
+    return report
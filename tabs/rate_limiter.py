@@ -0,0 +1,74 @@
+"""
+Rate-limit-aware concurrent scheduler for batches of API calls.
+
+RateLimiter keeps a sliding 60-second window of requests and tokens, and
+run_rate_limited fans work out to a thread pool under that budget with
+retries and jittered exponential backoff. Only errors marked retryable (see
+llm_client.LLMError) are retried; the rest fail the item at once.
+"""
+
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class RateLimiter:
+    """Block callers until a request fits the requests- and tokens-per-minute budget."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, window=60.0):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.window = window
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._events and self._events[0][0] <= now - self.window:
+                    self._tokens -= self._events.popleft()[1]
+                fits_tokens = self._tokens + tokens <= self.tpm or not self._events
+                if len(self._events) < self.rpm and fits_tokens:
+                    self._events.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                wait = self._events[0][0] + self.window - now
+            time.sleep(max(wait, 0.01))
+
+
+def _call_with_retries(fn, item, limiter, tokens, retries, base_delay):
+    for attempt in range(retries + 1):
+        limiter.acquire(tokens)
+        try:
+            return fn(item)
+        except Exception as e:
+            # Bad requests and missing keys fail the same way every time
+            if attempt == retries or not getattr(e, "retryable", False):
+                raise
+            time.sleep(base_delay * 2 ** attempt * (0.5 + random.random()))
+
+
+def run_rate_limited(fn, items, limiter, estimate_tokens=lambda item: 1,
+                     max_workers=4, retries=3, base_delay=1.0):
+    """Run fn over items concurrently under limiter.
+
+    Yields (index, result, error) in completion order so the caller can report
+    per-item progress from its own thread.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            # Each worker runs in a copy of the caller's context (keeps the metrics tab label)
+            pool.submit(contextvars.copy_context().run, _call_with_retries,
+                        fn, item, limiter, estimate_tokens(item), retries, base_delay): index
+            for index, item in enumerate(items)
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
@@ -0,0 +1,86 @@
+"""
+Receipt text post-processing for OCR output.
+
+All patterns are compiled once at import. clean_ocr_text fixes OCR mistakes in
+a single regex pass, and parse_text classifies lines in a single loop, so
+batch OCR output can be post-processed at thousands of receipts per second
+(see benchmarks/bench_receipt_parse.py).
+"""
+
+import re
+
+# Common OCR mistakes -> corrections
+OCR_REPLACEMENTS = {
+    "Toial": "Total",
+    "S": "$",
+    "Am": "",
+    "EXPIRES": "",
+    "PAYMENT": "",
+    "CAED": "CARD",
+    "GIei": "GIFT",
+    "CASUNNGE": "CASH"
+}
+
+# Longest first, so whole words like "CASUNNGE" win over the single "S"
+_REPLACEMENT_RE = re.compile("|".join(
+    re.escape(wrong) for wrong in sorted(OCR_REPLACEMENTS, key=len, reverse=True)
+))
+_NUMERIC_LINE_RE = re.compile(r'[\d\s/.,$]+')
+
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7F]+')
+STORE_RE = re.compile(r'(?i)(store|shop|market|mart|supermarket|inc|co|ltd|llc|receipt|invoice)\s?.{0,60}')
+DATE_RE = re.compile(r'(\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b)')
+TOTAL_RE = re.compile(r'(?i)(total|amount\s+due|balance\s+due|grand\s+total)[^\d]*(\d+[.,]\d{2})')
+# A word followed later by a price; same lines as [A-Za-z]{2,}.*\d+[.,]\d{2} without the backtracking
+ITEM_RE = re.compile(r'[A-Za-z]{2}.*\d[.,]\d\d')
+
+
+def clean_ocr_text(text):
+    """Fix common OCR mistakes and drop empty or numbers-only lines."""
+    text = _REPLACEMENT_RE.sub(lambda m: OCR_REPLACEMENTS[m.group(0)], text)
+
+    # Remove lines that are only numbers, dates, or empty
+    filtered_lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not _NUMERIC_LINE_RE.fullmatch(line):
+            filtered_lines.append(line)
+    return "\n".join(filtered_lines)
+
+
+def parse_text(text):
+    """Clean and extract structured data."""
+    text = _NON_ASCII_RE.sub(' ', text)
+    text = text.replace("  ", " ")
+
+    store = STORE_RE.search(text)
+    date = DATE_RE.search(text)
+    total = TOTAL_RE.search(text)
+
+    # Lines with prices
+    items = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and ITEM_RE.search(line):
+            items.append(line)
+
+    readable = []
+    if store:
+        readable.append(f"🛒 Store: {store.group(0)}")
+    if date:
+        readable.append(f"📅 Date: {date.group(1)}")
+    if total:
+        readable.append(f"💰 Total: ${total.group(2)}")
+
+    readable.append("\n🧾 Detected Items:")
+    if items:
+        readable.extend([f"{i+1}. {item}" for i, item in enumerate(items)])
+    else:
+        readable.append("No items detected.")
+
+    return "\n".join(readable), {
+        "store": store.group(0) if store else None,
+        "date": date.group(1) if date else None,
+        "total": total.group(2) if total else None,
+        "items": items,
+    }
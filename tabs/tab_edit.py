@@ -1,36 +1,233 @@
 import streamlit as st
-import os
-from openai import OpenAI
-from PyPDF2 import PdfReader
-import docx2txt
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-def extract_uploaded_text(uploaded_file):
-    text = ""
-    if uploaded_file.name.endswith(".txt"):
-        text = uploaded_file.read().decode("utf-8")
-    elif uploaded_file.name.endswith(".pdf"):
-        pdf = PdfReader(uploaded_file)
-        text = "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-    elif uploaded_file.name.endswith(".docx"):
-        text = docx2txt.process(uploaded_file)
-    return text.strip()
-
-def editorial_support(text, goal):
-    """Use GPT to improve the text."""
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import jobs, metrics
+from .doc_spool import as_text, describe, load_upload, show_compaction_report, show_document
+from .llm_client import LLMError, chat_completion, stream_chat_completion
+from .llm_router import route
+from .prompt_compact import compact_text
+
+# Input token budget per goal, after compaction; rewrites return about as much
+# text as they get, so the budget leaves room for the output
+EDIT_BUDGET = 12_000
+EDIT_BUDGETS = {"Make it concise": 24_000}
+
+# Incremental mode: paragraphs edited concurrently, results cached per session
+PARAGRAPH_CONCURRENCY = 8
+PARAGRAPH_CACHE_SIZE = 2000
+
+EDIT_GOALS = [
+    "Make it concise",
+    "Improve grammar & clarity",
+    "Enhance tone (professional, polite, confident)",
+    "Make it persuasive",
+    "Simplify language",
+    "Rewrite in formal tone",
+    "Rewrite in friendly tone",
+    "Rewrite for clarity",
+]
+MAX_GOALS = 4  # goals compared side by side in one run
+
+def edit_budget(goal):
+    return EDIT_BUDGETS.get(goal, EDIT_BUDGET)
+
+def _edit_request(text, goal, input_tokens):
+    return {
+        **route("edit", goal, input_tokens=input_tokens),
+        "messages": [
+            {"role": "system", "content": "You are an expert writing assistant."},
+            {"role": "user", "content": f"Improve this text with the goal: {goal}.\n\n{text}"}
+        ],
+        "temperature": 0.5,
+        "cache_options": {"goal": goal},
+    }
+
+def editorial_support(text, goal, stream=False):
+    """Use GPT to improve the text (a str or SpooledText).
+
+    With stream=True, returns a generator of text pieces instead of a string.
+    Raises LLMError if the AI call fails.
+    """
+    # Only page headers/footers are removed: the user expects every line they wrote back
+    with metrics.span("compact") as span:
+        text, report = compact_text(as_text(text), edit_budget(goal), keep_layout=True)
+        span.add_tokens(input=report["tokens_before"], output=report["tokens_after"])
+    with metrics.span("prompt_build"):
+        request = _edit_request(text, goal, report["tokens_after"])
+    if stream:
+        return stream_chat_completion(**request)
+    return chat_completion(**request)
+
+# --- Incremental (paragraph-level) editing ---
+def split_paragraphs(text):
+    return [p.strip() for p in text.replace("\r\n", "\n").split("\n\n") if p.strip()]
+
+def _paragraph_key(paragraph, goal):
+    normalized = " ".join(paragraph.split())
+    return hashlib.sha256(f"{goal}\n{normalized}".encode("utf-8")).hexdigest()
+
+def _edit_paragraph(paragraph, goal):
+    messages = [
+        {"role": "system", "content": "You are an expert writing assistant."},
+        {"role": "user", "content": (
+            f"Improve this paragraph from a longer document with the goal: {goal}.\n"
+            f"Return only the improved paragraph.\n\n{paragraph}"
+        )},
+    ]
+    return chat_completion(
+        **route("edit_paragraph", goal, messages=messages),
+        messages=messages,
+        temperature=0.5,
+        cache_options={"goal": goal, "mode": "paragraph"},
+    )
+
+def editorial_support_incremental(text, goal, cache, progress=None):
+    """Improve text paragraph by paragraph, reusing cached paragraphs.
+
+    cache maps (goal, paragraph) hashes to improved paragraphs and should live
+    in st.session_state, so re-runs only send new or changed paragraphs; they
+    are edited concurrently. Returns (improved_text, stats) where stats has
+    paragraphs, reused and sent. Raises LLMError if any paragraph fails; the
+    ones that succeeded stay cached.
+    """
+    paragraphs = split_paragraphs(as_text(text))
+    keys = [_paragraph_key(p, goal) for p in paragraphs]
+    results = {key: cache[key] for key in keys if key in cache}
+    pending = {key: p for key, p in zip(keys, paragraphs) if key not in results}
+    stats = {"paragraphs": len(paragraphs), "reused": len(paragraphs) - len(pending), "sent": len(pending)}
+
+    error = None
+    with ThreadPoolExecutor(max_workers=PARAGRAPH_CONCURRENCY) as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _edit_paragraph, paragraph, goal): key
+            for key, paragraph in pending.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                results[futures[future]] = cache[futures[future]] = future.result()
+            except LLMError as e:
+                error = error or e
+            if progress:
+                progress(done, len(futures))
+
+    # Bound the session cache; dicts keep insertion order, so the oldest go first
+    for key in list(cache)[:max(0, len(cache) - PARAGRAPH_CACHE_SIZE)]:
+        cache.pop(key, None)
+    if error:
+        raise error
+    return "\n\n".join(results[key] for key in keys), stats
+
+# --- Multi-goal fan-out ---
+def editorial_support_multi(text, goals, cache=None):
+    """Improve text for several goals concurrently.
+
+    Yields (goal, improved_text, error) as each goal finishes, so total time is
+    about that of the slowest goal. With a cache, each goal runs in incremental
+    mode (see editorial_support_incremental). A goal that raises is yielded
+    with the exception as its error; the other goals still finish.
+    """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert writing assistant."},
-                {"role": "user", "content": f"Improve this text with the goal: {goal}.\n\n{text}"}
-            ],
-            temperature=0.5,
-        )
-        return response.choices[0].message.content.strip()
+        text = as_text(text)  # read a spooled document once, not once per goal
     except Exception as e:
-        return f"⚠️ Error: {e}"
+        for goal in goals:
+            yield goal, None, e
+        return
+
+    def run(goal):
+        if cache is not None:
+            return editorial_support_incremental(text, goal, cache)[0]
+        return editorial_support(text, goal)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(goals))) as pool:
+        futures = {pool.submit(contextvars.copy_context().run, run, goal): goal for goal in goals}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:  # one goal failing (API, spool read, compaction) keeps the others
+                yield futures[future], None, e
+
+def show_goal_comparison(text, goals, incremental):
+    """Run all goals concurrently and fill one column per goal as results arrive."""
+    columns = st.columns(len(goals))
+    slots = {}
+    for column, goal in zip(columns, goals):
+        with column:
+            st.markdown(f"**{goal}**")
+            slots[goal] = st.empty()
+            slots[goal].caption("✍️ Working...")
+
+    cache = st.session_state.setdefault("editor_paragraph_cache", {}) if incremental else None
+    failed = 0
+    with st.spinner(f"✍️ Enhancing your text for {len(goals)} goals..."):
+        for goal, improved, error in editorial_support_multi(text, goals, cache):
+            if error:
+                failed += 1
+                slots[goal].error(f"⚠️ Error: {error}")
+            else:
+                slots[goal].text_area(goal, improved, height=300, key=f"editor_result_{EDIT_GOALS.index(goal)}",
+                                      label_visibility="collapsed")
+    if failed:
+        st.warning(f"⚠️ {failed} of {len(goals)} goals failed.")
+    else:
+        st.success("✅ Text improved for all goals!")
+
+# --- Background jobs ---
+def _edit_job(job, text, goal, cache=None):
+    if cache is not None:
+        improved, _ = editorial_support_incremental(
+            text, goal, cache, progress=lambda done, total: job.report(done, total, f"Paragraph {done} of {total}")
+        )
+        return improved
+    job.report(message="Enhancing...")
+    stream = editorial_support(text, goal, stream=True)
+    try:
+        for piece in stream:
+            job.partial += piece
+            job.report(message=f"{len(job.partial.split())} words received")
+    finally:
+        stream.close()  # on cancel, ends the API stream and frees its slot
+    return job.partial.strip()
+
+def _render_edit_job(job):
+    st.text_area("📄 Refined Output", job.result, height=300, key=f"editor_job_{job.id}")
+
+def _enhance_now(final_text, goals, incremental):
+    if len(goals) > 1:
+        show_goal_comparison(final_text, goals, incremental)
+        return
+
+    goal = goals[0]
+    output = st.empty()
+    if incremental:
+        cache = st.session_state.setdefault("editor_paragraph_cache", {})
+        try:
+            with st.spinner("✍️ Enhancing changed paragraphs..."):
+                bar = st.progress(0.0)
+                improved, stats = editorial_support_incremental(
+                    final_text, goal, cache,
+                    progress=lambda done, total: bar.progress(done / total, text=f"Paragraph {done} of {total}"),
+                )
+                bar.empty()
+        except LLMError as e:
+            output.error(f"⚠️ Error: {e} (finished paragraphs are kept; run again to retry the rest)")
+            return
+        st.success(
+            f"✅ Text improved! {stats['sent']} of {stats['paragraphs']} paragraphs sent, "
+            f"{stats['reused']} reused from earlier runs."
+        )
+        output.text_area("📄 Refined Output", improved, height=300)
+        return
+
+    try:
+        with output.container(), st.spinner("✍️ Enhancing your text..."):
+            improved = st.write_stream(editorial_support(final_text, goal, stream=True))
+    except LLMError as e:
+        output.error(f"⚠️ Error: {e}")
+        return
+
+    st.success("✅ Text improved!")
+    output.text_area("📄 Refined Output", improved, height=300)
 
 def show_edit_tab():
     st.subheader("✍️ Editorial Support")
@@ -43,52 +240,64 @@ def show_edit_tab():
         key="editor_upload"
     )
 
-    # Extract text when a file is uploaded
+    # Extract text when a file is uploaded (large documents come back as a SpooledText handle)
     extracted_text = ""
     if uploaded_edit is not None:
         with st.spinner("📖 Extracting text..."):
-            extracted_text = extract_uploaded_text(uploaded_edit)
-
-    # Unified text input area
-    raw_text = st.text_area(
-        "📝 Enter or paste your text (optional if file uploaded)",
-        value=extracted_text,
-        height=250,
-        key="editor_text"
+            bar = st.progress(0.0)
+            extracted_text = load_upload(
+                uploaded_edit,
+                progress=lambda done, total: bar.progress(done / total, text=f"📄 Page {done} of {total}"),
+            )
+            bar.empty()
+
+    if isinstance(extracted_text, str):
+        # Unified text input area
+        raw_text = st.text_area(
+            "📝 Enter or paste your text (optional if file uploaded)",
+            value=extracted_text,
+            height=250,
+            key="editor_text"
+        )
+    else:
+        # Large document: page through it instead of loading it into the browser
+        show_document(extracted_text, "editor_document")
+        raw_text = extracted_text
+
+    # Editing goals; several are run concurrently and compared side by side
+    goals = st.multiselect(
+        "🎯 Editing Goal(s)",
+        EDIT_GOALS,
+        default=EDIT_GOALS[:1],
+        max_selections=MAX_GOALS,
+        key="editor_goals",
+        help=f"Pick up to {MAX_GOALS} goals to compare the rewrites side by side.",
     )
 
-    # Editing goals
-    goal = st.selectbox(
-        "🎯 Editing Goal",
-        [
-            "Make it concise",
-            "Improve grammar & clarity",
-            "Enhance tone (professional, polite, confident)",
-            "Make it persuasive",
-            "Simplify language",
-            "Rewrite in formal tone",
-            "Rewrite in friendly tone",
-            "Rewrite for clarity",
-        ],
-        key="editor_goal"
+    incremental = st.checkbox(
+        "🔁 Incremental mode (edit paragraph by paragraph; re-runs only resend changed paragraphs)",
+        key="editor_incremental",
+    )
+    background = st.checkbox(
+        "🕒 Run in background (keep using the app; results appear below when ready)",
+        key="editor_background",
     )
 
     # Final text to process
-    final_text = raw_text.strip()
+    final_text = raw_text.strip() if isinstance(raw_text, str) else raw_text
+    if final_text and goals and not incremental:
+        show_compaction_report(final_text, min(edit_budget(g) for g in goals), keep_layout=True, limit="goal")
 
     if st.button("✨ Enhance Text", key="editor_run"):
         if not final_text:
             st.warning("⚠️ Please upload a file or paste text to edit.")
-            return
-
-        with st.spinner("✍️ Enhancing your text..."):
-            improved = editorial_support(final_text, goal)  
-
-        st.success("✅ Text improved!")
-        st.text_area("📄 Refined Output", improved, height=300)
-
-
-   
-
-
+        elif not goals:
+            st.warning("⚠️ Please choose at least one editing goal.")
+        elif background:
+            cache = st.session_state.setdefault("editor_paragraph_cache", {}) if incremental else None
+            for goal in goals:
+                jobs.submit("edit", f"{goal} ({describe(final_text)})", _edit_job, final_text, goal, cache)
+        else:
+            _enhance_now(final_text, goals, incremental)
 
+    jobs.show_jobs("edit", _render_edit_job)
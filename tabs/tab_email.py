@@ -1,61 +1,216 @@
 import streamlit as st
-import os
-from openai import OpenAI
+import csv
+import io
+import zipfile
+from . import metrics
+from .llm_client import LLMError, chat_completion, chat_completion_choices, stream_chat_completion
+from .llm_router import route
+from .rate_limiter import RateLimiter, run_rate_limited
 
-# Load key from Streamlit secrets if available
-if "OPENAI_API_KEY" in st.secrets:
-    os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def get_text_download_link(text, filename, key=None):
+    st.download_button("📥 Download Email", text, file_name=filename, key=key)
 
 
-def get_text_download_link(text, filename):
-    st.download_button("📥 Download Email", text, file_name=filename)
+# --- AI Email Generation Logic ---
+def _email_request(subject, recipient, tone, details, email_type, length):
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are an expert business communication assistant. "
+                "Your job is to write clear, polite, and natural emails that feel human. "
+                "You expand short bullet points into full, well-phrased sentences. "
+                "Structure the email with a greeting, purpose, main message, and polite closing. "
+                "Avoid repetition and keep tone consistent."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Write a {email_type.lower()} email.\n"
+                f"Subject: {subject}\n"
+                f"Recipient: {recipient}\n"
+                f"Tone: {tone}\n"
+                f"Length: {length}\n"
+                f"Key points: {details}\n\n"
+                f"Make it engaging, coherent, and properly formatted as an email body with greeting and signature. "
+                f"Do NOT just list or rephrase the key points — turn them into complete sentences that sound natural."
+            ),
+        },
+    ]
+    return {
+        **route("email", length, messages=messages, email_type=email_type),
+        "messages": messages,
+        "temperature": 0.75,
+        "cache_options": {"tone": tone, "email_type": email_type, "length": length},
+    }
 
 
-# --- AI Email Generation Logic ---
-def draft_email_with_ai(subject, recipient, tone, details, email_type, length):
-    """Generate well-written, human-like email based on user inputs."""
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert business communication assistant. "
-                        "Your job is to write clear, polite, and natural emails that feel human. "
-                        "You expand short bullet points into full, well-phrased sentences. "
-                        "Structure the email with a greeting, purpose, main message, and polite closing. "
-                        "Avoid repetition and keep tone consistent."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Write a {email_type.lower()} email.\n"
-                        f"Subject: {subject}\n"
-                        f"Recipient: {recipient}\n"
-                        f"Tone: {tone}\n"
-                        f"Length: {length}\n"
-                        f"Key points: {details}\n\n"
-                        f"Make it engaging, coherent, and properly formatted as an email body with greeting and signature. "
-                        f"Do NOT just list or rephrase the key points — turn them into complete sentences that sound natural."
-                    ),
-                },
-            ],
-            temperature=0.75,
-        )
-        return response.choices[0].message.content.strip()
-
-    except Exception as e:
-        return f"⚠️ Error generating email: {e}"
+def draft_email_with_ai(subject, recipient, tone, details, email_type, length, stream=False, n=1):
+    """Generate well-written, human-like email based on user inputs.
+
+    With stream=True, returns a generator of text pieces instead of a string.
+    With n > 1, returns a list of n alternative drafts from a single API call
+    (not streamed). Raises LLMError if the AI call fails.
+    """
+    with metrics.span("prompt_build"):
+        request = _email_request(subject, recipient, tone, details, email_type, length)
+    if n > 1:
+        return chat_completion_choices(**request, n=n)
+    if stream:
+        return stream_chat_completion(**request)
+    return chat_completion(**request)
+
+
+# --- Draft variants ---
+MAX_VARIANTS = 4
+VARIANTS_KEY = "email_variants_result"
+
+
+def show_email_variants():
+    """Show the drafts kept in session state side by side; reruns redraw them without an API call."""
+    result = st.session_state.get(VARIANTS_KEY)
+    if not result:
+        return
+    st.caption(f"{len(result['drafts'])} drafts for “{result['subject']}” — pick the one you like.")
+    for i, (column, draft) in enumerate(zip(st.columns(len(result["drafts"])), result["drafts"]), start=1):
+        with column:
+            st.markdown(f"**Draft {i}**")
+            st.text_area(f"Draft {i}", draft, height=300, key=f"email_variant_{result['id']}_{i}",
+                         label_visibility="collapsed")
+            get_text_download_link(draft, f"email_draft_{i}.txt", key=f"email_variant_download_{result['id']}_{i}")
+            with st.expander("📋 Copy"):
+                st.code(draft, language="markdown")
+
+
+# --- Bulk drafting from CSV ---
+BULK_COLUMNS = ["subject", "recipient", "tone", "type", "length", "key_points"]
+BULK_OUTPUT_TOKENS = 800  # budgeted completion size per email
+BULK_RESULT_KEY = "bulk_email_result"
+
+
+def _bulk_request(row):
+    return _email_request(
+        row["subject"], row["recipient"], row.get("tone") or "Professional", row["key_points"],
+        row.get("type") or "Follow-up", row.get("length") or "Medium (1 paragraph)",
+    )
+
+
+def _bulk_tokens(row):
+    request = _bulk_request(row)
+    prompt_chars = sum(len(m["content"]) for m in request["messages"])
+    return prompt_chars // 4 + request.get("max_tokens", BULK_OUTPUT_TOKENS)
+
+
+def draft_emails_bulk(rows, requests_per_minute=60, tokens_per_minute=60000, concurrency=4, retries=1):
+    """Draft one email per CSV row concurrently within the rate budget.
+
+    Yields (row_index, draft, error) as each row finishes.
+    """
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    yield from run_rate_limited(
+        lambda row: chat_completion(**_bulk_request(row)),
+        rows,
+        limiter,
+        estimate_tokens=_bulk_tokens,
+        max_workers=concurrency,
+        retries=retries,
+    )
+
+
+def export_bulk_drafts(rows, drafts):
+    """Return (csv_bytes, zip_bytes) with one draft per row."""
+    csv_buffer = io.StringIO()
+    writer = csv.DictWriter(csv_buffer, fieldnames=BULK_COLUMNS + ["draft"], extrasaction="ignore")
+    writer.writeheader()
+    for row, draft in zip(rows, drafts):
+        writer.writerow({**row, "draft": draft})
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i, (row, draft) in enumerate(zip(rows, drafts), start=1):
+            archive.writestr(f"email_{i:04d}.txt", f"Subject: {row['subject']}\n\n{draft}")
+        archive.writestr("drafts.csv", csv_buffer.getvalue())
+    return csv_buffer.getvalue().encode("utf-8"), zip_buffer.getvalue()
+
+
+def show_bulk_results():
+    """Show the last bulk run kept in session state; a download click reruns the tab and this redraws it."""
+    result = st.session_state.get(BULK_RESULT_KEY)
+    if not result:
+        return
+    rows, drafts, failures = result["rows"], result["drafts"], result["failures"]
+    if failures:
+        st.warning(f"⚠️ {failures} of {len(rows)} rows failed; their errors are included in the export.")
+    else:
+        st.success(f"✅ {len(rows)} email drafts generated!")
+
+    csv_bytes, zip_bytes = export_bulk_drafts(rows, drafts)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Download CSV", csv_bytes, file_name="email_drafts.csv", key="bulk_csv")
+    with col2:
+        st.download_button("📦 Download ZIP", zip_bytes, file_name="email_drafts.zip", key="bulk_zip")
+
+
+def show_bulk_email_section():
+    st.markdown(
+        "Upload a CSV with columns: " + ", ".join(f"`{c}`" for c in BULK_COLUMNS)
+        + ". `tone`, `type` and `length` fall back to defaults when empty."
+    )
+    uploaded_csv = st.file_uploader("📎 Upload CSV", type=["csv"], key="bulk_email_csv")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rpm = st.number_input("Requests / min", min_value=1, value=60, key="bulk_rpm")
+    with col2:
+        tpm = st.number_input("Tokens / min", min_value=1000, value=60000, step=1000, key="bulk_tpm")
+    with col3:
+        concurrency = st.number_input("Concurrency", min_value=1, max_value=32, value=4, key="bulk_concurrency")
+
+    if uploaded_csv is None:
+        st.session_state.pop(BULK_RESULT_KEY, None)
+        return
+    source = getattr(uploaded_csv, "file_id", uploaded_csv.name)
+    if st.session_state.get(BULK_RESULT_KEY, {}).get("source") != source:
+        st.session_state.pop(BULK_RESULT_KEY, None)  # results belong to the previous CSV
+
+    rows = list(csv.DictReader(io.StringIO(uploaded_csv.getvalue().decode("utf-8-sig"))))
+    missing = [c for c in ("subject", "recipient", "key_points") if rows and c not in rows[0]]
+    if not rows or missing:
+        st.warning(f"⚠️ CSV must contain rows with columns: subject, recipient, key_points. Missing: {missing}")
+        return
+    st.caption(f"{len(rows)} rows loaded.")
+
+    if st.button("🪄 Generate All Emails", key="bulk_run"):
+        drafts = [""] * len(rows)
+        failures = 0
+        bar = st.progress(0.0)
+        for done, (index, draft, error) in enumerate(
+            draft_emails_bulk(rows, int(rpm), int(tpm), int(concurrency)), start=1
+        ):
+            if error is not None:
+                failures += 1
+                draft = f"⚠️ Error generating email: {error}"
+            drafts[index] = draft
+            bar.progress(done / len(rows), text=f"📧 {done} of {len(rows)} drafted (row {index + 1} done)")
+
+        bar.empty()
+        st.session_state[BULK_RESULT_KEY] = {"source": source, "rows": rows, "drafts": drafts, "failures": failures}
+
+    show_bulk_results()
 
 
 def show_email_tab():
     st.subheader("✉️ Smart Email Assistant")
     st.markdown("Generate context-aware, natural-sounding emails.")
 
+    mode = st.radio("Mode", ["Single email", "Bulk from CSV"], horizontal=True, key="email_mode")
+    if mode == "Bulk from CSV":
+        show_bulk_email_section()
+        return
+
     col1, col2 = st.columns(2)
     with col1:
         subject = st.text_input("📌 Subject", placeholder="e.g., Follow up on proposal discussion")
@@ -84,19 +239,50 @@ def show_email_tab():
         height=150,
     )
 
+    variants = st.select_slider(
+        "🔀 Drafts to compare",
+        options=list(range(1, MAX_VARIANTS + 1)),
+        value=1,
+        key="email_variant_count",
+        help="Several drafts come from one AI request and stay here until you generate again.",
+    )
+
     if st.button("🪄 Generate Email"):
         if not subject or not recipient or not details:
             st.warning("⚠️ Please fill in all required fields.")
             return
 
-        with st.spinner("📧 Crafting your email..."):
-            email_output = draft_email_with_ai(subject, recipient, tone, details, email_type, length)
+        if variants > 1:
+            try:
+                with st.spinner(f"📧 Crafting {variants} drafts..."):
+                    drafts = draft_email_with_ai(subject, recipient, tone, details, email_type, length, n=variants)
+            except LLMError as e:
+                st.error(f"⚠️ Error generating email: {e}")
+                return
+            previous = st.session_state.get(VARIANTS_KEY) or {"id": 0}
+            st.session_state[VARIANTS_KEY] = {"id": previous["id"] + 1, "subject": subject, "drafts": drafts}
+            st.success(f"✅ {len(drafts)} email drafts generated!")
+            show_email_variants()
+            return
+
+        st.session_state.pop(VARIANTS_KEY, None)
+        preview = st.empty()
+        try:
+            with preview.container(), st.spinner("📧 Crafting your email..."):
+                email_output = st.write_stream(
+                    draft_email_with_ai(subject, recipient, tone, details, email_type, length, stream=True)
+                )
+        except LLMError as e:
+            preview.error(f"⚠️ Error generating email: {e}")
+            return
 
         st.success("✅ Email draft generated!")
-        st.text_area("📧 Email Preview", email_output, height=300)
+        preview.text_area("📧 Email Preview", email_output, height=300)
         get_text_download_link(email_output, "email_draft.txt")
 
         with st.expander("📋 Copy Email"):
             st.code(email_output, language="markdown")
+    else:
+        show_email_variants()
 
 
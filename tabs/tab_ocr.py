@@ -1,18 +1,18 @@
 import streamlit as st
+import os
 import cv2
 import numpy as np
-import re
-from PIL import Image, ImageEnhance
+from PIL import Image
+from . import metrics
+from .ocr_cache import content_key, fingerprint, ocr_cache
+from .receipt_parser import clean_ocr_text, parse_text
 
-import streamlit as st
-import easyocr
-
-@st.cache_resource  # ✅ only loads once per app session
+@st.cache_resource(show_spinner=False)  # ✅ only loads once per app session (also from background jobs)
 def get_easyocr_reader():
+    # Imported here so torch/EasyOCR load on the first OCR call, not at app startup
+    import easyocr
     return easyocr.Reader(['en'], gpu=False)
 
-reader = get_easyocr_reader()
-
 # =============================
 # ✅ Load EasyOCR
 # =============================
@@ -28,56 +28,92 @@ reader = get_easyocr_reader()
 # =============================
 # 🔧 Preprocessing Function
 # =============================
-def preprocess_image(image):
-    """Enhance image for better OCR accuracy on receipts/invoices."""
-    img = np.array(image.convert("RGB"))
-    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+# target_text_height: downscale until text is about this many pixels tall (None = keep full resolution)
+# denoise: one of DENOISE_FILTERS
+# Tuned with benchmarks/bench_ocr_preprocess.py
+PREPROCESS_PRESETS = {
+    "original": {"target_text_height": None, "denoise": "bilateral"},
+    "balanced": {"target_text_height": 32, "denoise": "bilateral_fast"},
+    "fast": {"target_text_height": 24, "denoise": "median"},
+}
+# "original" is the pre-preset pipeline, bit for bit. Switch to a faster preset (the
+# OCR tab's selector, or VA_OCR_PRESET for the app default and the API) once
+# bench_ocr_preprocess.py shows it keeps EasyOCR accuracy on real receipts.
+DEFAULT_PRESET = os.getenv("VA_OCR_PRESET", "original")
+if DEFAULT_PRESET not in PREPROCESS_PRESETS:
+    raise ValueError(f"VA_OCR_PRESET must be one of {list(PREPROCESS_PRESETS)}, not {DEFAULT_PRESET!r}")
+
+DENOISE_FILTERS = {
+    "bilateral": lambda g: cv2.bilateralFilter(g, 9, 75, 75),
+    "bilateral_fast": lambda g: cv2.bilateralFilter(g, 5, 50, 50),
+    "median": lambda g: cv2.medianBlur(g, 3),
+    "gaussian": lambda g: cv2.GaussianBlur(g, (3, 3), 0),
+    "none": lambda g: g,
+}
+
+BRIGHTNESS = 1.1
+CONTRAST = 1.5
+
+
+def estimate_text_height(gray):
+    """Median height in pixels of character-sized blobs, measured on a reduced copy."""
+    scale = min(1.0, 1000 / max(gray.shape))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # Characters: a few pixels tall, not page-sized, not long horizontal rules
+    chars = (heights >= 3) & (heights <= small.shape[0] // 8) & (widths <= 3 * heights)
+    if chars.sum() < 10:
+        return None
+    return float(np.median(heights[chars])) / scale
+
+
+def _brightness_contrast_lut(gray):
+    # Same result as PIL ImageEnhance.Brightness(1.1) then Contrast(1.5), as one lookup table
+    levels = np.arange(256, dtype=np.float32)
+    bright = np.floor(np.clip(levels * BRIGHTNESS, 0, 255))
+    mean = int(float(np.dot(np.bincount(gray.ravel(), minlength=256), bright)) / gray.size + 0.5)
+    return np.floor(np.clip(mean + CONTRAST * (bright - mean), 0, 255)).astype(np.uint8)
+
+
+def preprocess_image(image, preset=DEFAULT_PRESET):
+    """Enhance image for better OCR accuracy on receipts/invoices.
+
+    Accepts a PIL image or a NumPy array and stays in NumPy/OpenCV throughout.
+    """
+    options = PREPROCESS_PRESETS[preset]
+    img = np.asarray(image.convert("RGB")) if isinstance(image, Image.Image) else np.asarray(image)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+
+    # Downscale large photos so text lands near the recognizer's sweet spot
+    target = options["target_text_height"]
+    if target:
+        text_height = estimate_text_height(gray)
+        if text_height and text_height > target * 1.25:
+            scale = target / text_height
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
 
     # Slight brightness & contrast boost
-    pil_img = Image.fromarray(gray)
-    pil_img = ImageEnhance.Brightness(pil_img).enhance(1.1)
-    pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
-    gray = np.array(pil_img)
+    gray = cv2.LUT(gray, _brightness_contrast_lut(gray))
 
     # Light noise reduction (helps EasyOCR focus)
-    gray = cv2.bilateralFilter(gray, 9, 75, 75)
+    gray = DENOISE_FILTERS[options["denoise"]](gray)
 
     return gray
 
-def clean_ocr_text(text):
-    # Fix common OCR mistakes
-    replacements = {
-        "Toial": "Total",
-        "S": "$",
-        "Am": "",
-        "EXPIRES": "",
-        "PAYMENT": "",
-        "CAED": "CARD",
-        "GIei": "GIFT",
-        "CASUNNGE": "CASH"
-    }
-    for wrong, right in replacements.items():
-        text = text.replace(wrong, right)
-    
-    # Remove lines that are only numbers, dates, or empty
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
-    filtered_lines = []
-    for l in lines:
-        if re.match(r'^[\d\s/.,$]+$', l):  # skip lines with only numbers/symbols
-            continue
-        filtered_lines.append(l)
-    
-    return "\n".join(filtered_lines)
-    
 
 # =============================
 # 🔍 OCR Extraction
 # =============================
-def extract_text(image):
+def extract_text(image, preset=DEFAULT_PRESET):
     """Extract text using EasyOCR."""
     try:
-        processed = preprocess_image(image)
-        result = reader.readtext(processed, detail=0, paragraph=True)
+        with metrics.span("preprocess", preset=preset):
+            processed = preprocess_image(image, preset)
+        with metrics.span("ocr"):
+            result = get_easyocr_reader().readtext(processed, detail=0, paragraph=True)
         text = "\n".join(result)
         return text.strip()
     except Exception as e:
@@ -85,46 +121,25 @@ def extract_text(image):
 
 
 # =============================
-# 🧾 Parse Text for Useful Info
+# 💾 Cached OCR + Parse
 # =============================
-def parse_text(text):
-    """Clean and extract structured data."""
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    text = text.replace("  ", " ")
-
-    # More flexible patterns
-    store_pattern = r'(?i)(store|shop|market|mart|supermarket|inc|co|ltd|llc|receipt|invoice)\s?.{0,60}'
-    date_pattern = r'(\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b)'
-    total_pattern = r'(?i)(total|amount\s+due|balance\s+due|grand\s+total)[^\d]*(\d+[.,]\d{2})'
-
-    store = re.search(store_pattern, text)
-    date = re.search(date_pattern, text)
-    total = re.search(total_pattern, text)
-
-    # Lines with prices
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
-    items = [l for l in lines if re.search(r'[A-Za-z]{2,}.*\d+[.,]\d{2}', l)]
-
-    readable = []
-    if store:
-        readable.append(f"🛒 Store: {store.group(0)}")
-    if date:
-        readable.append(f"📅 Date: {date.group(1)}")
-    if total:
-        readable.append(f"💰 Total: ${total.group(2)}")
-
-    readable.append("\n🧾 Detected Items:")
-    if items:
-        readable.extend([f"{i+1}. {item}" for i, item in enumerate(items)])
-    else:
-        readable.append("No items detected.")
-
-    return "\n".join(readable), {
-        "store": store.group(0) if store else None,
-        "date": date.group(1) if date else None,
-        "total": total.group(2) if total else None,
-        "items": items,
-    }
+def extract_and_parse(image, data, page=1, preset=DEFAULT_PRESET):
+    """Run extract_text + parse_text, reusing cached results for the same (or a re-encoded) scan.
+
+    The cache holds one result per scan, whichever preset produced it.
+    """
+    with metrics.span("ingest", format="image"):
+        key, fp = content_key(data, page), fingerprint(image)
+        cached = ocr_cache.lookup(key, fp)
+    if cached is not None:
+        return cached["text"], cached["readable"], cached["structured"]
+
+    text = extract_text(image, preset)
+    with metrics.span("parse"):
+        readable, structured = parse_text(text)
+    if not text.startswith("⚠️"):
+        ocr_cache.store(key, fp, text, readable, structured)
+    return text, readable, structured
 
 
 # =============================
@@ -133,6 +148,22 @@ def parse_text(text):
 def show_ocr_tab():
     st.subheader("🖼️ Image → Text Conversion (EasyOCR)")
 
+    mode = st.radio("Mode", ["Single image", "Batch (many files / PDFs)"], horizontal=True, key="ocr_mode")
+    presets = list(PREPROCESS_PRESETS)
+    preset = st.selectbox(
+        "⚙️ Preprocessing",
+        presets,
+        index=presets.index(DEFAULT_PRESET),
+        key="ocr_preset",
+        help="original: full resolution, strongest denoise. balanced / fast: downscale large photos "
+             "to the text size EasyOCR needs and denoise more lightly; much faster on phone photos. "
+             "Scans already in the OCR cache are reused whatever the preset.",
+    )
+    if mode != "Single image":
+        from .ocr_batch import show_batch_ocr_section
+        show_batch_ocr_section(preset)
+        return
+
     uploaded = st.file_uploader(
         "Upload invoice, receipt, or note",
         type=["png", "jpg", "jpeg", "tiff", "bmp", "webp"]
@@ -144,8 +175,7 @@ def show_ocr_tab():
 
         if st.button("Extract Text"):
             with st.spinner("🔍 Extracting text using EasyOCR..."):
-                text = extract_text(img)
-                readable, structured = parse_text(text)
+                text, readable, structured = extract_and_parse(img, uploaded.getvalue(), preset=preset)
 
             st.success("✅ Extraction Complete!")
             st.text_area("🧾 Cleaned Text", value=readable, height=400)
@@ -1,53 +1,283 @@
 import streamlit as st
-import docx2txt
-from PyPDF2 import PdfReader
-from openai import OpenAI
-
-# Initialize OpenAI client
-client = OpenAI()
-
-# --- Helper: extract text from uploaded files ---
-def extract_uploaded_text(uploaded_file):
-    """Extract text from .txt, .pdf, or .docx files."""
-    text = ""
-    if uploaded_file.name.endswith(".txt"):
-        text = uploaded_file.read().decode("utf-8")
-    elif uploaded_file.name.endswith(".pdf"):
-        pdf = PdfReader(uploaded_file)
-        text = "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-    elif uploaded_file.name.endswith(".docx"):
-        text = docx2txt.process(uploaded_file)
-    return text.strip()
+import asyncio
+import re
+import numpy as np
+from . import jobs, metrics
+from .doc_spool import as_text, describe, load_upload, show_compaction_report, show_document
+from .llm_client import LLMError, chat_completion, stream_chat_completion
+from .llm_router import route
+from .prompt_compact import compact_text, trim_to_budget
 
+# Map-reduce settings for large documents (token counts are estimates)
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = 6000
+MAX_CONCURRENT_CHUNKS = 4
 
 # --- OpenAI-powered summarization ---
-def openai_summarize_text(text, length_option):
-    """Use OpenAI model to summarize text based on the chosen length."""
-    length_prompt = {
-        "Very short (1–2 lines)": "Summarize this text in 1–2 concise lines.",
-        "Short (3–5 lines)": "Summarize this text in 3–5 bullet points.",
-        "Detailed paragraph": "Summarize this text in a detailed paragraph."
-    }
+LENGTH_PROMPTS = {
+    "Very short (1–2 lines)": "Summarize this text in 1–2 concise lines.",
+    "Short (3–5 lines)": "Summarize this text in 3–5 bullet points.",
+    "Detailed paragraph": "Summarize this text in a detailed paragraph."
+}
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a professional text summarizer."},
-                {"role": "user", "content": f"{length_prompt[length_option]}\n\nText:\n{text}"}
-            ],
+# Token budget per length option for the final summarization prompt; the whole
+# document is compacted and condensed by map-reduce before this applies
+SUMMARY_BUDGETS = {
+    "Very short (1–2 lines)": 60_000,
+    "Short (3–5 lines)": 80_000,
+    "Detailed paragraph": 120_000,
+}
+
+CHUNK_PROMPT = (
+    "Summarize this section of a longer document. Keep every key fact, figure, "
+    "name, date and obligation so the section summaries can be combined later."
+)
+
+
+def estimate_tokens(text):
+    """Rough token count used to size chunks without a tokenizer."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """Split text on paragraph/line boundaries into chunks of at most max_tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks, current, size = [], [], 0
+    for block in text.split("\n"):
+        # A single oversized line (e.g. PDF text without breaks) is hard-split
+        pieces = [block[i:i + max_chars] for i in range(0, len(block), max_chars)] or [""]
+        for piece in pieces:
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(current).strip())
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current).strip())
+    return [c for c in chunks if c]
+
+
+def _summary_messages(instruction, text):
+    return [
+        {"role": "system", "content": "You are a professional text summarizer."},
+        {"role": "user", "content": f"{instruction}\n\nText:\n{text}"}
+    ]
+
+
+async def _summarize_async(semaphore, instruction, text):
+    # The shared client is synchronous; worker threads reuse its connection pool
+    async with semaphore:
+        return await asyncio.to_thread(
+            chat_completion,
+            **route("summary_chunk", input_tokens=estimate_tokens(text)),
+            messages=_summary_messages(instruction, text),
             temperature=0.5,
         )
-        summary = response.choices[0].message.content.strip()
-        return summary
-    except Exception as e:
-        return f"⚠️ Error during summarization: {e}"
+
+
+async def _map_reduce_summarize(text):
+    """Summarize chunks concurrently, then reduce the partial summaries level by level."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHUNKS)
+    parts = split_into_chunks(text)
+    while len(parts) > 1:
+        parts = await asyncio.gather(*[
+            _summarize_async(semaphore, CHUNK_PROMPT, part) for part in parts
+        ])
+        # Group partial summaries into the next level of chunks
+        merged = split_into_chunks("\n\n".join(parts))
+        parts = merged if len(merged) < len(parts) else ["\n\n".join(parts)]
+    return parts[0]
+
+
+def _summary_request(text, length_option):
+    """Build the final summarization call, compacting and then condensing large documents first."""
+    text = as_text(text)
+    with metrics.span("compact") as span:
+        text, report = compact_text(text)
+        span.add_tokens(input=report["tokens_before"], output=report["tokens_after"])
+    if estimate_tokens(text) > CHUNK_TOKENS:
+        with metrics.span("condense") as span:
+            span.add_tokens(input=estimate_tokens(text))
+            text = asyncio.run(_map_reduce_summarize(text))
+            span.add_tokens(output=estimate_tokens(text))
+    with metrics.span("prompt_build"):
+        text = trim_to_budget(text, SUMMARY_BUDGETS[length_option])
+        return {
+            **route("summary", length_option, input_tokens=estimate_tokens(text)),
+            "messages": _summary_messages(LENGTH_PROMPTS[length_option], text),
+            "temperature": 0.5,
+            "cache_options": {"length": length_option},
+        }
+
+
+def _stream_summary(text, length_option):
+    # A generator, so large documents are condensed only once streaming starts
+    yield from stream_chat_completion(**_summary_request(text, length_option))
+
+
+def openai_summarize_text(text, length_option, stream=False):
+    """Use OpenAI model to summarize text (a str or SpooledText) based on the chosen length.
+
+    With stream=True, returns a generator of text pieces instead of a string.
+    Raises LLMError if the AI call fails.
+    """
+    if stream:
+        return _stream_summary(text, length_option)
+    summary = chat_completion(**_summary_request(text, length_option))
+    return summary
+
+
+# --- Local extractive summarization (TF-IDF + TextRank) ---
+EXTRACTIVE_SENTENCES = {
+    "Very short (1–2 lines)": 2,
+    "Short (3–5 lines)": 5,
+    "Detailed paragraph": 8,
+}
+# Sentences ranked by TextRank after a linear-time TF-IDF centroid prefilter,
+# and the vocabulary kept for the similarity matrix (bounds memory on huge documents)
+TEXTRANK_MAX_SENTENCES = 1000
+TEXTRANK_MAX_TERMS = 5000
+TEXTRANK_DAMPING = 0.85
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have he her his i if in into is it its "
+    "me my no not of on or our she so than that the their them then there these they this "
+    "to was we were what when which who will with would you your".split()
+)
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=[\"\'(]?[A-Z0-9])|\n\s*\n')
+_WORD_RE = re.compile(r"[a-z][a-z'-]+")
+
+
+def split_sentences(text):
+    sentences = (" ".join(s.split()) for s in _SENTENCE_RE.split(text))
+    return [s for s in sentences if len(s) > 20]
+
+
+def _tfidf(token_lists, vocab_size):
+    """Sparse TF-IDF in COO form (rows, cols, values), L2-normalized per sentence."""
+    rows = np.repeat(np.arange(len(token_lists)), [len(t) for t in token_lists])
+    cols = np.fromiter((term for tokens in token_lists for term in tokens), dtype=np.int64, count=len(rows))
+    # Collapse repeated (sentence, term) pairs into counts
+    pairs, counts = np.unique(rows * vocab_size + cols, return_counts=True)
+    rows, cols = pairs // vocab_size, pairs % vocab_size
+    df = np.bincount(cols, minlength=vocab_size)
+    idf = np.log((1 + len(token_lists)) / (1 + df)) + 1
+    values = (1 + np.log(counts)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(token_lists)))
+    return rows, cols, values / np.maximum(norms[rows], 1e-12)
+
+
+def textrank_scores(sentences):
+    """Importance score per sentence: TextRank over TF-IDF cosine similarity."""
+    vocab = {}
+    token_lists = [
+        [vocab.setdefault(w, len(vocab)) for w in _WORD_RE.findall(s.lower()) if w not in STOPWORDS]
+        for s in sentences
+    ]
+    n = len(sentences)
+    if n == 0 or not vocab:
+        return np.zeros(n)
+    rows, cols, values = _tfidf(token_lists, len(vocab))
+
+    # Prefilter: similarity to the document centroid, O(nonzeros)
+    centroid = np.bincount(cols, weights=values, minlength=len(vocab)) / n
+    scores = np.bincount(rows, weights=values * centroid[cols], minlength=n)
+    candidates = np.sort(np.argsort(-scores)[:TEXTRANK_MAX_SENTENCES])
+    if len(candidates) < 3:
+        return scores
+
+    # Dense candidate x term matrix over the most informative terms
+    keep = np.isin(rows, candidates)
+    c_rows, c_cols, c_values = rows[keep], cols[keep], values[keep]
+    terms = np.argsort(-np.bincount(c_cols, weights=c_values, minlength=len(vocab)))[:TEXTRANK_MAX_TERMS]
+    term_index = np.full(len(vocab), -1)
+    term_index[terms] = np.arange(len(terms))
+    row_index = np.full(n, -1)
+    row_index[candidates] = np.arange(len(candidates))
+    matrix = np.zeros((len(candidates), len(terms)), dtype=np.float32)
+    in_terms = term_index[c_cols] >= 0
+    matrix[row_index[c_rows[in_terms]], term_index[c_cols[in_terms]]] = c_values[in_terms]
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.zeros_like(similarity), where=out_weight > 0)
+    rank = np.full(len(candidates), 1 / len(candidates), dtype=np.float32)
+    for _ in range(50):
+        updated = (1 - TEXTRANK_DAMPING) / len(candidates) + TEXTRANK_DAMPING * (transition.T @ rank)
+        converged = np.abs(updated - rank).sum() < 1e-6
+        rank = updated
+        if converged:
+            break
+
+    result = np.zeros(n)
+    result[candidates] = rank
+    return result
+
+
+def extractive_summarize(text, length_option):
+    """Pick the top-ranked sentences, in document order. Local and instant; no API call."""
+    text = as_text(text)
+    with metrics.span("extractive") as span:
+        sentences = split_sentences(compact_text(text)[0])
+        scores = textrank_scores(sentences)
+        top = np.sort(np.argsort(-scores, kind="stable")[:EXTRACTIVE_SENTENCES[length_option]])
+        span.add_tokens(input=estimate_tokens(text))
+    picked = [sentences[i] for i in top]
+    if length_option == "Short (3–5 lines)":
+        return "\n".join(f"• {s}" for s in picked)
+    return " ".join(picked)
 
 
 # --- Download helper ---
-def get_text_download_link(text, filename):
+def get_text_download_link(text, filename, key=None):
     """Generate a Streamlit download button for text content."""
-    st.download_button("📥 Download Summary", text, file_name=filename)
+    st.download_button("📥 Download Summary", text, file_name=filename, key=key)
+
+
+# --- Background jobs ---
+def _summary_job(job, text, length_option):
+    text = as_text(text)
+    job.report(message="Condensing the document..." if estimate_tokens(text) > CHUNK_TOKENS else "Summarizing...")
+    stream = openai_summarize_text(text, length_option, stream=True)
+    try:
+        for piece in stream:
+            job.partial += piece
+            job.report(message=f"{len(job.partial.split())} words received")
+    finally:
+        stream.close()  # on cancel, ends the API stream and frees its slot
+    return job.partial.strip()
+
+
+def _render_summary_job(job):
+    st.text_area("🧾 Summary Output", job.result, height=250, key=f"summary_job_{job.id}")
+    get_text_download_link(job.result, "summary.txt", key=f"summary_job_download_{job.id}")
+
+
+def _summarize_now(final_text, length, engine):
+    preview_slot = st.empty()
+    output = st.empty()
+    preview = extractive_summarize(final_text, length)
+    if engine != "AI (GPT)":
+        st.success("✅ Summary generated locally!")
+        output.text_area("🧾 Summary Output", preview, height=250)
+        get_text_download_link(preview, "summary.txt")
+        return
+
+    # The extractive summary stays visible above the AI summary while it streams in
+    preview_slot.info(f"⚡ Quick preview (extractive):\n\n{preview}")
+    try:
+        with output.container(), st.spinner("🤖 Generating AI summary..."):
+            summary = st.write_stream(openai_summarize_text(final_text, length, stream=True))
+    except LLMError as e:
+        preview_slot.empty()
+        st.warning(f"⚠️ AI summary unavailable ({e}). Showing the local extractive summary instead.")
+        output.text_area("🧾 Summary Output", preview, height=250)
+        get_text_download_link(preview, "summary.txt")
+        return
+    preview_slot.empty()
+    st.success("✅ Summary generated successfully!")
+    output.text_area("🧾 Summary Output", summary, height=250)
+    get_text_download_link(summary, "summary.txt")
 
 
 # --- Streamlit UI ---
@@ -60,35 +290,40 @@ def show_summary_tab():
         type=["txt", "pdf", "docx"],
         key="summary_upload"
     )
-    # Extract text when file is uploaded
+    # Extract text when file is uploaded (large documents come back as a SpooledText handle)
     extracted_text = ""
     if uploaded_file is not None:
         with st.spinner("📖 Extracting text..."):
-            extracted_text = extract_uploaded_text(uploaded_file)
-
-# Show a text area either way:
-# - If file is uploaded: pre-fill with extracted text
-# - If no file: show empty box for manual pasting
-    text_input = st.text_area(
-        "📝 Paste long text or report (optional if a file is uploaded)",
-        value=extracted_text,
-        height=250,
-        key="summary_text"
-    )
+            bar = st.progress(0.0)
+            extracted_text = load_upload(
+                uploaded_file,
+                progress=lambda done, total: bar.progress(done / total, text=f"📄 Page {done} of {total}"),
+            )
+            bar.empty()
 
-# Final text to use (either uploaded OR typed)
-    final_text = text_input.strip()
+    if isinstance(extracted_text, str):
+        # Show a text area either way:
+        # - If file is uploaded: pre-fill with extracted text
+        # - If no file: show empty box for manual pasting
+        text_input = st.text_area(
+            "📝 Paste long text or report (optional if a file is uploaded)",
+            value=extracted_text,
+            height=250,
+            key="summary_text"
+        )
+
+        # Final text to use (either uploaded OR typed)
+        final_text = text_input.strip()
+    else:
+        # Large document: page through it instead of loading it into the browser
+        show_document(extracted_text, "summary_document")
+        final_text = extracted_text
     
     if not final_text:
         st.warning("Please upload a file or paste text to summarize.")
     else:
         # Proceed with summarization
         st.success("Text detected. Ready to summarize!")
-        # Extract text from uploaded file
-        default_text = ""
-        if uploaded_file:
-            with st.spinner("📖 Extracting text..."):
-                default_text = extract_uploaded_text(uploaded_file)
 
     # Summary length options
     length = st.selectbox(
@@ -96,16 +331,34 @@ def show_summary_tab():
         ["Very short (1–2 lines)", "Short (3–5 lines)", "Detailed paragraph"],
         key="summary_length"
     )
+    engine = st.radio(
+        "⚙️ Summarizer",
+        ["AI (GPT)", "Local (instant, extractive)"],
+        horizontal=True,
+        key="summary_engine",
+        help="The local summarizer picks the most central sentences; it needs no API call.",
+    )
+    background = engine == "AI (GPT)" and st.checkbox(
+        "🕒 Run in background (keep using the app; the result appears below when ready)",
+        key="summary_background",
+    )
+
+    if final_text:
+        report = show_compaction_report(final_text)
+        if report["tokens_after"] > CHUNK_TOKENS:
+            sections = -(-report["tokens_after"] // CHUNK_TOKENS)
+            st.caption(f"📚 Long document: summarized in about {sections:,} sections, which are then combined.")
 
     # Summarize button
     if st.button("✨ Summarize Document", key="summarize_doc"):
-        if text_input.strip():
-            with st.spinner("🤖 Generating AI summary..."):
-                summary = openai_summarize_text(text_input, length)
-            st.success("✅ Summary generated successfully!")
-            st.text_area("🧾 Summary Output", summary, height=250)
-            get_text_download_link(summary, "summary.txt")
-        else:
+        if not final_text:
             st.warning("⚠️ Please provide text to summarize.")
+        elif background:
+            jobs.submit("summary", f"Summary ({length}) of {describe(final_text)}",
+                        _summary_job, final_text, length)
+        else:
+            _summarize_now(final_text, length, engine)
+
+    jobs.show_jobs("summary", _render_summary_job)
 
 
@@ -0,0 +1,41 @@
+"""DOCX streaming: paragraph text comes out in docx2txt's order."""
+
+import io
+import os
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tabs.doc_ingest import _extract  # noqa: E402
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _docx(body, header=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+        if header:
+            archive.writestr("word/header1.xml", f"<w:hdr {W}>{header}</w:hdr>")
+    return io.BytesIO(buffer.getvalue())
+
+
+def _p(*runs):
+    return "<w:p>" + "".join(runs) + "</w:p>"
+
+
+def _r(text):
+    return f"<w:r><w:t>{text}</w:t></w:r>"
+
+
+def test_runs_tabs_and_breaks():
+    body = _p("<w:r><w:t>x</w:t><w:tab/><w:t>y</w:t><w:br/><w:t>z</w:t></w:r>") + _p(_r("w"))
+    assert _extract("a.docx", _docx(body, header=_p(_r("HEAD")))) == "HEAD\n\nx\ty\nz\n\nw"
+
+
+def test_text_box_follows_the_text_before_it():
+    # A text box is a nested w:p; the outer paragraph's runs after it join the box's last paragraph
+    box = "<w:r><w:pict><w:txbxContent>" + _p(_r("inner")) + "</w:txbxContent></w:pict></w:r>"
+    body = _p(_r("outer"), box, _r("tail")) + _p(_r("next"))
+    assert _extract("a.docx", _docx(body)) == "outer\n\ninnertail\n\nnext"
@@ -0,0 +1,69 @@
+"""Perceptual OCR cache: re-encodes of a scan hit, look-alike receipts from the same template miss."""
+
+import io
+import os
+import random
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import receipt_lines, render_receipt  # noqa: E402
+from tabs.ocr_cache import OCRCache, content_key, fingerprint  # noqa: E402
+
+SIZE = {"width": 1200, "height": 1600, "font_size": 28}
+
+
+def _jpeg(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def receipt():
+    return receipt_lines(random.Random(3))
+
+
+@pytest.fixture
+def cache(tmp_path, receipt):
+    image = render_receipt(receipt, seed=1, **SIZE)
+    cache = OCRCache(cache_dir=tmp_path)
+    data = _jpeg(image, 95)
+    cache.store(content_key(data), fingerprint(image), "\n".join(receipt), "", {"total": receipt[-2]})
+    return cache, image
+
+
+def _lookup(cache, data):
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    return cache.lookup(content_key(data), fingerprint(image))
+
+
+def test_reencoded_scan_hits(cache, receipt):
+    cache, image = cache
+    entry = _lookup(cache, _jpeg(image, 90))
+    assert entry is not None and entry["text"] == "\n".join(receipt)
+    assert cache.perceptual_hits == 1
+
+
+def test_changed_price_and_total_misses(cache, receipt):
+    cache, _ = cache
+    lines = list(receipt)
+    lines[4] = lines[4][:-4] + "9" + lines[4][-3:]
+    lines[-2] = "TOTAL 31.06"
+    assert _lookup(cache, _jpeg(render_receipt(lines, seed=2, **SIZE), 95)) is None
+
+
+def test_changed_date_misses(cache, receipt):
+    cache, _ = cache
+    lines = list(receipt)
+    lines[2] = "12/03/2024" if lines[2] != "12/03/2024" else "13/03/2024"
+    assert _lookup(cache, _jpeg(render_receipt(lines, seed=1, **SIZE), 95)) is None
+
+
+def test_resized_copy_misses(cache):
+    cache, image = cache
+    half = image.resize((image.width // 2, image.height // 2), Image.LANCZOS)
+    assert _lookup(cache, _jpeg(half, 95)) is None
@@ -0,0 +1,67 @@
+"""Prompt compaction: page headers/footers go, content the user wrote never does."""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import document_text, make_pdf  # noqa: E402
+from tabs import tab_summary  # noqa: E402
+from tabs.doc_ingest import _extract  # noqa: E402
+from tabs.prompt_compact import compact_text  # noqa: E402
+
+STEPS = "Step 1\nMix the flour.\nStep 2\nAdd the eggs.\nStep 3\nBake for 20 minutes."
+TABLE = "Apples\n12\nPears\n45\nPlums\n7\nFigs\n3"
+MEETINGS = "Meeting on 3 May with legal\nMeeting on 5 May with legal\nMeeting on 9 May with legal"
+CLAUSE = "Clause 99: the supplier indemnifies the buyer against all third-party claims."
+
+
+def _lines(text):
+    return [line.strip() for line in text.split("\n") if line.strip()]
+
+
+def test_repeated_lines_inside_text_are_kept():
+    for text in (STEPS, TABLE, MEETINGS):
+        assert _lines(compact_text(text)[0]) == _lines(text)
+
+
+def test_keep_layout_leaves_text_unchanged():
+    text = "Dear team,\n\n    - indented item\n    - another   item\n\n\n" + MEETINGS + "\n\n" + STEPS
+    paragraph = "This paragraph is long enough to be deduplicated when it repeats."
+    text += f"\n\n{paragraph}\n\n{paragraph}"
+    assert compact_text(text, keep_layout=True)[0] == text
+
+
+def test_pdf_page_headers_footers_and_numbers_are_removed():
+    pages = [
+        f"ACME Corp - Confidential\n{document_text(3, seed=n)}\n{STEPS}\n{document_text(3, seed=-n)}\nPage {n} of 5"
+        for n in range(1, 6)
+    ]
+    text = _extract("report.pdf", io.BytesIO(make_pdf(pages)))
+    compacted, report = compact_text(text)
+    lines = _lines(compacted)
+    assert lines.count("ACME Corp - Confidential") == 1
+    assert lines.count("Page 1 of 5") == 1 and "Page 2 of 5" not in lines
+    assert lines.count("Step 1") == 5  # repeated on every page, but not at the top or bottom
+    assert report["tokens_saved"] > 0 and report["tokens_truncated"] == 0
+
+
+def test_budget_cut_is_reported_separately():
+    text = document_text(paragraphs=40)
+    report = compact_text(text, budget=500)[1]
+    assert report["truncated"] and report["tokens_after"] <= 500
+    assert report["tokens_truncated"] == report["tokens_before"] - report["tokens_saved"] - report["tokens_after"]
+
+
+def test_summary_sees_the_end_of_a_long_document(monkeypatch):
+    def fake_completion(messages, **kwargs):
+        # Partial summaries keep the clause, so it must reach the final prompt
+        return CLAUSE if CLAUSE in messages[-1]["content"] else "Routine delivery terms."
+
+    monkeypatch.setattr(tab_summary, "chat_completion", fake_completion)
+    text = document_text(paragraphs=600) + "\n\n" + CLAUSE
+    option = "Very short (1–2 lines)"
+    assert tab_summary.estimate_tokens(text) > tab_summary.SUMMARY_BUDGETS[option]
+    request = tab_summary._summary_request(text, option)
+    assert CLAUSE in request["messages"][-1]["content"]